@@ -0,0 +1,23 @@
+import importlib
+
+"""
+betterdaily
+The BetterDaily tools as one package. Submodules are imported on first use (betterdaily.catalog
+loads only the catalog), and heavy dependencies such as MoviePy, PySceneDetect and the speech
+recognizers are imported by the functions that need them, so short jobs start quickly.
+`python -m betterdaily <command> [args]` runs any command; with `python -m betterdaily serve`
+running, commands are handed to that long-lived process, which keeps modules and models loaded
+between jobs.
+"""
+
+# Modules with a main(argv) that `python -m betterdaily <command>` runs.
+COMMANDS = ("audioseg", "batch", "benchmark_classifier", "catalog", "combine_audio_visual", "extract_frames",
+            "frame_dataset", "phash", "pipeline", "transcribe", "video", "vidtoclips", "visuals")
+
+MODULES = COMMANDS + ("analysis_reader", "clip_extract", "daemon", "detectors", "ffmpeg_utils", "jobs", "mp3cut",
+                      "overlays", "parallel_scenes", "recognizers", "scene_cache", "scenes")
+
+def __getattr__(name):
+    if name in MODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
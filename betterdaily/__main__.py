@@ -0,0 +1,40 @@
+import argparse
+import sys
+
+from . import COMMANDS, daemon
+
+"""
+python -m betterdaily <command> [args]
+Single entry point for the BetterDaily commands. `serve` starts the daemon that keeps modules and
+models loaded; other commands run on it when it is listening and in this process otherwise.
+"""
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m betterdaily",
+                                     description="Run a BetterDaily command, on the daemon when one is running")
+    parser.add_argument("--local", action="store_true", help="Run in this process even if a daemon is running")
+    parser.add_argument("--socket", default=daemon.SOCKET_PATH, help="Daemon socket path")
+    parser.add_argument("command", choices=COMMANDS + ("serve", "stop"), help="Command to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments passed to the command")
+    args = parser.parse_args(argv)
+
+    if args.command in ("serve", "stop") and args.args:
+        parser.error(f"{args.command} takes no arguments; put options before the command")
+    if args.command == "serve":
+        if not daemon.available():
+            parser.error("the daemon needs Unix domain sockets and fork(), which this platform lacks")
+        return daemon.serve(args.socket)
+    if args.command == "stop":
+        if daemon.send("stop", [], args.socket) is None:
+            print("No daemon is running")
+            return 1
+        print("Daemon stopped")
+        return 0
+    if not args.local:
+        status = daemon.send(args.command, args.args, args.socket)
+        if status is not None:
+            return status
+    return daemon.run_command(args.command, args.args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import queue
+import re
+import subprocess
+import threading
+import numpy as np
+from .ffmpeg_utils import ffmpeg_binary
+
+"""
+analysis_reader.py
+Shared frame reader for the analysis passes (scene detection, key-frame classification).
+By default frames come from OpenCV at full resolution. With a proxy width, ffmpeg decodes and
+scales the video and pipes small BGR frames instead, and with keyframes_only it also skips
+decoding every non-key frame. Frames are always numbered in the original stream, so scene
+timecodes, and the clip cuts made from them, refer to the source video whatever was decoded.
+"""
+
+SHOWINFO_PTS = re.compile(r"Parsed_showinfo.*\bn:\s*\d+.*\bpts_time:\s*([-\d.eE+]+)")
+
+def source_info(video_path):
+    import cv2
+    # Returns (fps, width, height, frame count) of the source video.
+    cap = cv2.VideoCapture(video_path)
+    info = (cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    cap.release()
+    return info
+
+def downscale_for_detection(frame, downscale):
+    import cv2
+    # Same resize SceneManager applies before handing frames to its detectors.
+    if downscale <= 1:
+        return frame
+    return cv2.resize(frame, (round(frame.shape[1] / downscale), round(frame.shape[0] / downscale)),
+                      interpolation=cv2.INTER_LINEAR)
+
+def read_frames(video_path, width=None, keyframes_only=False, start_frame=0, end_frame=None):
+    # Yields (frame number, frame) for the frames in [start_frame, end_frame). width is the proxy
+    # width to decode at (None for the source resolution).
+    if width is None and not keyframes_only:
+        yield from read_frames_opencv(video_path, start_frame, end_frame)
+    else:
+        yield from read_frames_ffmpeg(video_path, width, keyframes_only, start_frame, end_frame)
+
+def frame_at(video_path, frame_num, width=None, keyframes_only=False):
+    # The frame numbered frame_num, read with a seek through the same reader as the scan, or None
+    # when it cannot be read (in keyframe mode, when frame_num is not a key frame).
+    frames = read_frames(video_path, width, keyframes_only, frame_num, frame_num + 1)
+    try:
+        return next(frames, (None, None))[1]
+    finally:
+        frames.close()
+
+def read_frames_opencv(video_path, start_frame=0, end_frame=None):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frame_num = start_frame
+    try:
+        while end_frame is None or frame_num < end_frame:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_num, frame
+            frame_num += 1
+    finally:
+        cap.release()
+
+def read_frames_ffmpeg(video_path, width=None, keyframes_only=False, start_frame=0, end_frame=None):
+    fps, source_width, source_height, _ = source_info(video_path)
+    width = min(width or source_width, source_width)
+    height = max(1, round(source_height * width / source_width))
+
+    cmd = [ffmpeg_binary(), "-hide_banner", "-nostats", "-loglevel", "info"]
+    if width < source_width:
+        # Deblocking only smooths detail the downscale throws away anyway.
+        cmd += ["-skip_loop_filter", "all"]
+    if keyframes_only:
+        cmd += ["-skip_frame", "nokey"]
+    if start_frame > 0:
+        # Decoding after an input seek is frame-accurate; -copyts keeps the source timestamps.
+        # Seek half a frame early so rounding never drops start_frame itself.
+        cmd += ["-ss", f"{(start_frame - 0.5) / fps:.6f}", "-copyts"]
+    cmd += ["-i", video_path, "-map", "0:v:0", "-an", "-sn",
+            "-vf", f"scale={width}:{height}:flags=area,showinfo", "-vsync", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL)
+
+    # showinfo logs the timestamp of every frame it passes, in output order, on stderr.
+    timestamps = queue.Queue()
+
+    def read_log():
+        for line in process.stderr:
+            match = SHOWINFO_PTS.search(line.decode(errors="replace"))
+            if match:
+                timestamps.put(float(match.group(1)))
+
+    log_reader = threading.Thread(target=read_log, daemon=True)
+    log_reader.start()
+
+    frame_size = width * height * 3
+    frame_num = start_frame
+    try:
+        while end_frame is None or frame_num < end_frame:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                break
+            if keyframes_only:
+                # Only key frames come through, so number them from their timestamps.
+                frame_num = round(timestamps.get(timeout=30) * fps)
+                if end_frame is not None and frame_num >= end_frame:
+                    break
+            yield frame_num, np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+            if not keyframes_only:
+                frame_num += 1
+    finally:
+        process.kill()
+        process.wait()
+        log_reader.join()
+
+def stream_scenes(video_path, threshold=30.0, min_scene_len=15, width=None, keyframes_only=False, downscale=None,
+                  start_frame=0):
+    from scenedetect import FrameTimecode
+    from scenedetect.detectors import ContentDetector
+    from scenedetect.scene_detector import FlashFilter
+    from scenedetect.scene_manager import compute_downscale_factor
+    # Decode the video once, yielding ((start, end), key_frame) as soon as each scene is closed.
+    # Only the key frame of the open scene and of the last above-threshold frame are held, so
+    # memory stays flat regardless of the episode length. Key frames are proxy frames when a
+    # proxy width is set. downscale is the further factor frames are shrunk by for the detector
+    # (None picks it from the frame width, like SceneManager). start_frame resumes an earlier
+    # scan at the start of a scene it reported, yielding the scenes from there on.
+    fps, _, _, total_frames = source_info(video_path)
+    # min_scene_len=0 turns the detector into a pure threshold test; the flash filter then applies
+    # the minimum scene length exactly as SceneManager would.
+    detector = ContentDetector(threshold=threshold, min_scene_len=0)
+    flash_filter = FlashFilter(mode=FlashFilter.Mode.MERGE, length=min_scene_len)
+    if start_frame > 0:
+        # Whenever a cut is reported, the filter's state is the same: the cut frame was the last
+        # one above the threshold, merging is enabled and no merge is under way. Two
+        # above-threshold frames min_scene_len apart put it there; the frames after the cut that
+        # were read before it was reported were all below the threshold and change nothing.
+        flash_filter.filter(frame_num=start_frame - min_scene_len, above_threshold=True)
+        flash_filter.filter(frame_num=start_frame, above_threshold=True)
+
+    scene_start, scene_key_frame = start_frame, None
+    last_above = None
+    frame_num = start_frame - 1
+    for next_num, frame in read_frames(video_path, width, keyframes_only, start_frame):
+        # Frames that were not decoded count as below the threshold; they can still close a
+        # merged scene.
+        for skipped in range(frame_num + 1, next_num):
+            for cut in flash_filter.filter(frame_num=skipped, above_threshold=False):
+                yield (FrameTimecode(scene_start, fps), FrameTimecode(cut, fps)), scene_key_frame
+                scene_start, scene_key_frame = last_above
+        frame_num = next_num
+        if scene_key_frame is None:
+            scene_key_frame = frame
+        if downscale is None:
+            downscale = compute_downscale_factor(frame.shape[1])
+        above = bool(detector.process_frame(frame_num, downscale_for_detection(frame, downscale)))
+        if above:
+            last_above = (frame_num, frame)
+        for cut in flash_filter.filter(frame_num=frame_num, above_threshold=above):
+            # A cut is always reported on a frame that was above the threshold, which is either
+            # the current frame or the most recent one seen.
+            yield (FrameTimecode(scene_start, fps), FrameTimecode(cut, fps)), scene_key_frame
+            scene_start, scene_key_frame = last_above
+
+    # Like SceneManager.get_scene_list, a video without any cut yields no scenes. When only key
+    # frames were decoded, the last scene still runs to the end of the stream.
+    if scene_start > 0 and frame_num >= scene_start:
+        end = max(frame_num + 1, total_frames) if keyframes_only else frame_num + 1
+        yield (FrameTimecode(scene_start, fps), FrameTimecode(end, fps)), scene_key_frame
+
+def detect_scenes_proxy(video_path, threshold=30.0, width=None, keyframes_only=False, downscale=None):
+    return [scene for scene, _ in stream_scenes(video_path, threshold, width=width, keyframes_only=keyframes_only,
+                                                downscale=downscale)]
@@ -0,0 +1,146 @@
+import csv
+import json
+import os
+import re
+import sys
+from pydub import AudioSegment
+from . import mp3cut
+
+# frames: copy whole MP3 frames; accurate: decode and re-encode each segment.
+CUT_MODES = ("frames", "accurate")
+USAGE = ("Usage: python audioseg.py <transcription_file> <source_audio_path> <output_path> [frames|accurate] "
+         "[transcript.jsonl]")
+
+def parse_time(value):
+    # "90500" (ms), "1:30.5" (m:s) or "0:01:30.5" (h:m:s) -> milliseconds; None if value is
+    # not a time.
+    if re.fullmatch(r"\d+", value):
+        return int(value)
+    if re.fullmatch(r"(\d+:){1,2}\d+(\.\d+)?", value):
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+        return round(seconds * 1000)
+    return None
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+def load_transcript(transcript_file):
+    # Flattens the JSONL transcript written by transcribe.py into (word, start_ms, end_ms)
+    # tokens. Chunks without word timings contribute their words with the chunk's bounds.
+    tokens = []
+    with open(transcript_file) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("words"):
+                tokens.extend((normalize_word(w["word"]), w["start_ms"], w["end_ms"]) for w in record["words"])
+            else:
+                tokens.extend((normalize_word(w), record["start_ms"], record["end_ms"])
+                              for w in record.get("text", "").split())
+    return [token for token in tokens if token[0]]
+
+def find_phrase(tokens, phrase, after_ms=0):
+    # Returns (start_ms, end_ms) of the first occurrence of phrase starting at or after after_ms.
+    words = [w for w in map(normalize_word, phrase.split()) if w]
+    if not words:
+        raise ValueError(f"Empty phrase in segment spec: {phrase!r}")
+    for i in range(len(tokens) - len(words) + 1):
+        if tokens[i][1] >= after_ms and all(tokens[i + j][0] == w for j, w in enumerate(words)):
+            return tokens[i][1], tokens[i + len(words) - 1][2]
+    raise ValueError(f"Phrase not found in transcript: {phrase!r}")
+
+def resolve_segment(line, tokens):
+    # A spec line is "start,end" where each side is milliseconds, [h:]m:s, or a quoted phrase
+    # (a start phrase starts the segment, an end phrase ends it), or a single phrase on its own.
+    fields = [field.strip() for field in next(csv.reader([line], skipinitialspace=True))]
+    if len(fields) not in (1, 2):
+        raise ValueError(f"Invalid segment spec: {line.strip()!r}")
+    times = [parse_time(field) for field in fields]
+    if any(t is None for t in times) and tokens is None:
+        raise ValueError(f"Phrase segment specs need a transcript: {line.strip()!r}")
+
+    if len(fields) == 1:
+        if times[0] is not None:
+            raise ValueError(f"Invalid segment spec: {line.strip()!r}")
+        return find_phrase(tokens, fields[0])
+    start = times[0] if times[0] is not None else find_phrase(tokens, fields[0])[0]
+    end = times[1] if times[1] is not None else find_phrase(tokens, fields[1], after_ms=start)[1]
+    if end <= start:
+        raise ValueError(f"Segment ends before it starts: {line.strip()!r}")
+    return start, end
+
+def clip_path(output_path, source_audio_path, i):
+    # The clip cut from line i (0-based) of the segments file.
+    audio_basename = os.path.basename(source_audio_path)
+    return os.path.join(output_path, f"{os.path.splitext(audio_basename)[0]}_clip{i+1}.mp3")
+
+def cut_clip(source_audio_path, index, start, end, clip_filename):
+    # index is the mp3cut frame index of the source for frame copying, or None to decode and
+    # re-encode just this segment. The whole segment is re-encoded, not only the frames around
+    # its cuts: splicing freshly encoded edges onto copied frames would leave the encoder's
+    # delay and padding as gaps at both joins, and the bit reservoir of the first copied frame
+    # would point into audio that is no longer there.
+    if index is not None:
+        mp3cut.cut(source_audio_path, index, start, end, clip_filename)
+    else:
+        clip = AudioSegment.from_file(source_audio_path, start_second=start / 1000,
+                                      duration=(end - start) / 1000)
+        clip.export(clip_filename, format="mp3")
+
+def create_audio_segments(transcription_file, source_audio_path, output_path, mode="frames",
+                          transcript_file=None):
+    # transcript_file is the JSONL transcript from transcribe.py that phrase specs are resolved
+    # against; by default <source audio name>.jsonl next to transcription_file is used if present.
+    # mode "frames" copies whole MP3 frames without decoding (cuts snap to the nearest frame,
+    # about 26 ms); "accurate" decodes and re-encodes only the audio inside each segment.
+    if mode not in CUT_MODES:
+        raise ValueError(f"Unknown cut mode {mode!r}, expected one of {', '.join(CUT_MODES)}")
+    # Ensure the Completed Clips directory exists
+    os.makedirs(output_path, exist_ok=True)
+    
+    with open(transcription_file, 'r') as file:
+        lines = file.readlines()
+    
+    audio_basename = os.path.basename(source_audio_path)
+    if transcript_file is None:
+        candidate = os.path.join(os.path.dirname(transcription_file),
+                                 os.path.splitext(audio_basename)[0] + ".jsonl")
+        transcript_file = candidate if os.path.exists(candidate) else None
+    tokens = load_transcript(transcript_file) if transcript_file else None
+    if mode == "frames" and not source_audio_path.lower().endswith(".mp3"):
+        print(f"{audio_basename} is not an MP3 file, cutting it in accurate mode.")
+        mode = "accurate"
+    index = mp3cut.build_index(source_audio_path) if mode == "frames" else None
+    
+    for i, line in enumerate(lines):
+        if line.strip():
+            start, end = resolve_segment(line, tokens)
+            clip_filename = clip_path(output_path, source_audio_path, i)
+            try:
+                cut_clip(source_audio_path, index, start, end, clip_filename)
+            except ValueError as e:
+                print(f"Skipped clip {i+1} for {audio_basename}: {e}")
+                continue
+            print(f"Exported clip {i+1} for {audio_basename} to {clip_filename}")
+    
+    print("All files processed.")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) > 2:
+        transcription_file = argv[0]
+        source_audio_path = argv[1]
+        output_path = argv[2]
+        mode = argv[3] if len(argv) > 3 else "frames"
+        if mode not in CUT_MODES:
+            sys.exit(f"Unknown mode {mode!r}.\n{USAGE}")
+        transcript_file = argv[4] if len(argv) > 4 else None
+        create_audio_segments(transcription_file, source_audio_path, output_path, mode, transcript_file)
+    else:
+        print(USAGE)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from . import analysis_reader
+from . import scene_cache
+from . import visuals
+from . import vidtoclips
+from .clip_extract import EXTRACT_MODES
+
+"""
+batch.py
+Runs vidtoclips or visuals over a whole season. Episodes are given as directories or glob
+patterns and processed on a pool of processes, each writing to <output_root>/<episode name>.
+Finished episodes are recorded in <output_root>/batch.json with a signature over the episode's
+fingerprint and the options, so a rerun skips them; an episode interrupted during analysis
+resumes from the checkpoint it left in its output folder. A table of scenes,
+clips and throughput per episode is printed at the end.
+"""
+
+BATCH_STATE_FILE = "batch.json"
+CHECKPOINT_FILE = ".scenes.checkpoint.jsonl"
+EPISODE_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.webm')
+TOOLS = ("vidtoclips", "visuals")
+# The analysis options in the order the extractors take them as a tuple.
+ANALYSIS_OPTIONS = ("proxy_width", "keyframes_only", "downscale")
+
+def find_episodes(sources):
+    # Expands directories and glob patterns into a sorted, duplicate-free list of videos.
+    episodes = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths = [os.path.join(source, f) for f in sorted(os.listdir(source))]
+        else:
+            paths = sorted(glob.glob(source))
+        for path in paths:
+            path = os.path.abspath(path)
+            if path.lower().endswith(EPISODE_EXTENSIONS) and os.path.isfile(path) and path not in episodes:
+                episodes.append(path)
+    return episodes
+
+def load_state(output_root):
+    path = os.path.join(output_root, BATCH_STATE_FILE)
+    episodes = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            episodes = json.load(file).get("episodes", {})
+    return {"path": path, "episodes": episodes}
+
+def save_state(state):
+    tmp_path = state["path"] + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump({"episodes": state["episodes"]}, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, state["path"])
+
+def episode_signature(tool, episode, options):
+    blob = json.dumps({"tool": tool, "video": scene_cache.file_fingerprint(episode), "options": options},
+                      sort_keys=True)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+def init_worker(threads):
+    import cv2
+    # Every process decodes and classifies on its own, so OpenCV gets its share of the cores.
+    cv2.setNumThreads(threads)
+
+def run_episode(tool, episode, output_folder, options):
+    # Processes one episode in a pool process and returns its summary.
+    os.makedirs(output_folder, exist_ok=True)
+    checkpoint = os.path.join(output_folder, CHECKPOINT_FILE)
+    analysis = {name: options[name] for name in ANALYSIS_OPTIONS}
+    summary = {}
+    started = time.perf_counter()
+    if tool == "vidtoclips":
+        timings = vidtoclips.process_video(episode, output_folder, 1, options["threshold"], options["cache"],
+                                           options["extract_mode"], checkpoint=checkpoint, summary=summary,
+                                           **analysis)
+    else:
+        timings = visuals.process_video(episode, output_folder, 1, options["cache"], options["extract_mode"],
+                                        tuple(analysis.values()), checkpoint=checkpoint, summary=summary)
+    fps, _, _, frames = analysis_reader.source_info(episode)
+    return {"scenes": summary["scenes"], "clips": len(timings), "seconds": time.perf_counter() - started,
+            "duration": frames / fps if fps > 0 else 0.0}
+
+def print_summary(episodes, results):
+    # results maps each episode to its summary, or to an error message.
+    print(f"{'episode':<32} {'scenes':>7} {'clips':>6} {'time s':>8} {'speed':>8}")
+    totals = {"scenes": 0, "clips": 0, "seconds": 0.0, "duration": 0.0}
+    failed = 0
+    for episode in episodes:
+        name = os.path.basename(episode)[:32]
+        result = results.get(episode)
+        if result is None:
+            print(f"{name:<32} {'not run':>7}")
+        elif isinstance(result, str):
+            failed += 1
+            print(f"{name:<32} {'failed':>7}  {result}")
+        else:
+            for key in totals:
+                totals[key] += result[key]
+            speed = result["duration"] / result["seconds"] if result["seconds"] > 0 else 0.0
+            note = " (earlier run)" if result.get("resumed") else ""
+            print(f"{name:<32} {result['scenes']:>7} {result['clips']:>6} {result['seconds']:>8.1f} "
+                  f"{speed:>7.1f}x{note}")
+    print(f"{len(episodes) - failed} of {len(episodes)} episodes done: {totals['scenes']} scenes, "
+          f"{totals['clips']} clips, {totals['duration'] / 60:.1f} min of video")
+    return failed
+
+def run_batch(tool, sources, output_root, jobs=None, options=None, restart=False):
+    # Returns the number of episodes that failed.
+    episodes = find_episodes(sources)
+    if not episodes:
+        print("No episodes found.")
+        return 0
+    os.makedirs(output_root, exist_ok=True)
+    state = load_state(output_root)
+    results = {}
+    pending = []
+    for episode in episodes:
+        entry = state["episodes"].get(episode)
+        output_folder = os.path.join(output_root, os.path.splitext(os.path.basename(episode))[0])
+        signature = episode_signature(tool, episode, options)
+        if not restart and entry and entry["signature"] == signature and os.path.isdir(output_folder):
+            results[episode] = dict(entry["summary"], resumed=True)
+        else:
+            pending.append((episode, output_folder, signature))
+    print(f"{len(episodes)} episodes, {len(episodes) - len(pending)} already done")
+
+    # Scene detection inside an episode is serial, so one process per core keeps them all busy.
+    cores = os.cpu_count() or 1
+    jobs = max(1, min(jobs or cores, len(pending) or 1))
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(max(1, cores // jobs),)) as executor:
+        futures = {executor.submit(run_episode, tool, episode, output_folder, options): (episode, signature)
+                   for episode, output_folder, signature in pending}
+        try:
+            for future in as_completed(futures):
+                episode, signature = futures[future]
+                try:
+                    results[episode] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[episode] = f"{type(e).__name__}: {e}"
+                    continue
+                state["episodes"][episode] = {"signature": signature, "summary": results[episode]}
+                save_state(state)
+                print(f"Finished {os.path.basename(episode)}: {results[episode]['scenes']} scenes, "
+                      f"{results[episode]['clips']} clips")
+        except BrokenProcessPool:
+            # A worker died outright (out of memory, killed); what finished is saved, and a rerun
+            # resumes the rest.
+            for future, (episode, _) in futures.items():
+                if episode not in results:
+                    results[episode] = "worker process died"
+
+    wall = time.perf_counter() - started
+    failed = print_summary(episodes, results)
+    processed = [results[episode] for episode, _, _ in pending if isinstance(results.get(episode), dict)]
+    if processed and wall > 0:
+        video = sum(result["duration"] for result in processed)
+        print(f"Processed {len(processed)} episodes in {wall:.1f}s with {jobs} processes: "
+              f"{video / wall:.1f}x real time overall")
+    return failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract clips from many episodes, resuming an interrupted batch.")
+    parser.add_argument("tool", choices=TOOLS, help="Which extractor to run on every episode")
+    parser.add_argument("output_root", help="Each episode's clips go to <output_root>/<episode name>")
+    parser.add_argument("sources", nargs="+", help="Episode files, directories or glob patterns")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Episodes processed at once (default: one per core)")
+    parser.add_argument("--threshold", type=float, default=30.0,
+                        help="ContentDetector threshold for vidtoclips (default: %(default)s)")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default="copy")
+    parser.add_argument("--cache", default=scene_cache.DEFAULT_CACHE_PATH,
+                        help="Analysis cache file (default: %(default)s)")
+    parser.add_argument("--proxy-width", type=int, default=None)
+    parser.add_argument("--keyframes-only", action="store_true")
+    parser.add_argument("--downscale", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="Process every episode again, ignoring batch.json")
+    args = parser.parse_args(argv)
+    options = {"threshold": args.threshold, "extract_mode": args.extract_mode, "cache": args.cache,
+               "proxy_width": args.proxy_width, "keyframes_only": args.keyframes_only, "downscale": args.downscale}
+    failed = run_batch(args.tool, args.sources, args.output_root, args.jobs, options, args.restart)
+    raise SystemExit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
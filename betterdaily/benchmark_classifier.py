@@ -0,0 +1,78 @@
+import sys
+import time
+import numpy as np
+from .detectors import face_cascade, reset_stats, stats_report
+from .vidtoclips import classify_frames
+
+"""
+benchmark_classifier.py
+Times the original per-frame scene classifier against the batched classify_frames path on
+frames sampled from a video, and reports how often both agree on the label.
+"""
+
+def classify_scene_per_frame(frame):
+    import cv2
+    # The classifier as it was before the batched feature extraction: one HSV conversion per
+    # red check, a gray conversion per detector and the full-resolution frame throughout.
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if red_check(frame) or red_check(frame):
+        return "training"
+    elif cv2.countNonZero(cv2.Canny(gray, 50, 150, apertureSize=3)) > 1000:
+        return "fight"
+    elif len(face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)) > 0:
+        return "struggle"
+    elif np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)) > 200:
+        return "victory"
+    return "other"
+
+def red_check(frame):
+    import cv2
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask1 = cv2.inRange(hsv, np.array([0, 120, 70]), np.array([10, 255, 255]))
+    mask2 = cv2.inRange(hsv, np.array([170, 120, 70]), np.array([180, 255, 255]))
+    return cv2.countNonZero(mask1 + mask2) / (frame.shape[0] * frame.shape[1]) > 0.01
+
+def sample_frames(video_path, count):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for frame_num in np.linspace(0, max(total - 1, 0), count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+def benchmark(frames, repeat=3):
+    def best_of(fn):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    per_frame_time, per_frame_labels = best_of(lambda: [classify_scene_per_frame(f) for f in frames])
+    reset_stats()
+    batched_time, batched_labels = best_of(lambda: classify_frames(frames))
+    agreement = np.mean(np.array(per_frame_labels) == batched_labels)
+
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"per-frame: {per_frame_time * 1000:.1f} ms ({per_frame_time / len(frames) * 1000:.2f} ms/frame)")
+    print(f"batched:   {batched_time * 1000:.1f} ms ({batched_time / len(frames) * 1000:.2f} ms/frame)")
+    print(f"speedup:   {per_frame_time / batched_time:.1f}x, label agreement {agreement:.1%}")
+    print(stats_report())
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        video_path = argv[0]
+        count = int(argv[1]) if len(argv) > 1 else 200
+        benchmark(sample_frames(video_path, count))
+    else:
+        print("Usage: python -m betterdaily benchmark_classifier <video_path> [frame_count]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import itertools
+import os
+import re
+import sqlite3
+from collections import Counter
+from .ffmpeg_utils import probe_video
+
+"""
+catalog.py
+Persistent SQLite index of visual clips: duration, resolution, fps, codec and the category taken
+from the clip_{category}_N file name. Files are only probed again when their mtime or size
+changes, so refreshing a folder of hundreds of clips costs one stat per file. Posts pick their
+visuals from the catalog by category and duration, chaining several clips when no single one
+is long enough. Each post ranks the clips by a hash of its own audio file name and the clip name,
+so its pick does not depend on any other post, and adding or removing a clip only changes the
+posts that pick that clip.
+"""
+
+DEFAULT_CATALOG_PATH = os.path.expanduser("~/.cache/betterdaily/catalog.sqlite")
+VISUAL_EXTENSIONS = ('.mp4', '.mov')
+COLUMNS = ("path", "mtime", "size", "duration", "width", "height", "fps", "codec", "category")
+
+def clip_category(path):
+    match = re.match(r"clip_([a-z]+)_\d+", os.path.basename(path))
+    return match.group(1) if match else "other"
+
+def open_catalog(path=DEFAULT_CATALOG_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS clips ("
+                 "path TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL, duration REAL, "
+                 "width INTEGER, height INTEGER, fps REAL, codec TEXT, category TEXT NOT NULL)")
+    conn.commit()
+    return conn
+
+def refresh(conn, paths):
+    # Brings the catalog rows for paths up to date and returns them as dicts, skipping files
+    # without a video stream.
+    paths = [os.path.abspath(p) for p in paths]
+    known = {}
+    for start in range(0, len(paths), 500):
+        batch = paths[start:start + 500]
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM clips WHERE path IN ({', '.join('?' * len(batch))})",
+                            batch).fetchall()
+        known.update((row[0], dict(zip(COLUMNS, row))) for row in rows)
+
+    clips = []
+    for path in paths:
+        stat = os.stat(path)
+        row = known.get(path)
+        if row is None or row["mtime"] != stat.st_mtime or row["size"] != stat.st_size:
+            info = probe_video(path) or {"duration": None, "width": None, "height": None, "fps": None, "codec": None}
+            row = dict(info, path=path, mtime=stat.st_mtime, size=stat.st_size, category=clip_category(path))
+            conn.execute(f"INSERT OR REPLACE INTO clips ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                         [row[column] for column in COLUMNS])
+        if row["duration"]:
+            clips.append(row)
+    conn.commit()
+    return clips
+
+def refresh_dir(conn, visual_dir):
+    # Refreshes every visual in visual_dir and drops the rows of files that no longer exist.
+    visual_dir = os.path.abspath(visual_dir)
+    paths = sorted(os.path.join(visual_dir, f) for f in os.listdir(visual_dir) if f.endswith(VISUAL_EXTENSIONS))
+    present = set(paths)
+    stale = [row[0] for row in conn.execute("SELECT path FROM clips WHERE path LIKE ?",
+                                            (os.path.join(visual_dir, "%"),))
+             if os.path.dirname(row[0]) == visual_dir and row[0] not in present]
+    conn.executemany("DELETE FROM clips WHERE path = ?", [(path,) for path in stale])
+    return refresh(conn, paths)
+
+def clip_rank(seed, path):
+    return hashlib.blake2b(f"{seed}\0{os.path.basename(path)}".encode(), digest_size=8).digest()
+
+def choose_visuals(clips, duration, category=None, seed=""):
+    # Returns the clips to play, in order, to cover duration seconds. A single clip that is long
+    # enough is preferred; otherwise clips are chained, reusing them if the whole pool is too
+    # short. seed (the post's audio file name) decides the order clips are tried in, which
+    # spreads posts over the pool.
+    pool = [clip for clip in clips if category is None or clip["category"] == category] or clips
+    if not pool:
+        return []
+
+    ranked = sorted(pool, key=lambda clip: (clip_rank(seed, clip["path"]), clip["path"]))
+    long_enough = [clip for clip in ranked if clip["duration"] >= duration]
+    if long_enough:
+        return long_enough[:1]
+    chosen = []
+    total = 0.0
+    for clip in itertools.cycle(ranked):
+        if total >= duration:
+            break
+        chosen.append(clip)
+        total += clip["duration"]
+    return chosen
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index a folder of visual clips and summarise it.")
+    parser.add_argument("visual_dir")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="Catalog file (default: %(default)s)")
+    args = parser.parse_args(argv)
+    conn = open_catalog(args.catalog)
+    clips = refresh_dir(conn, args.visual_dir)
+    conn.close()
+    for category, count in sorted(Counter(clip["category"] for clip in clips).items()):
+        seconds = sum(clip["duration"] for clip in clips if clip["category"] == category)
+        print(f"{category}: {count} clips, {seconds:.1f} s")
+
+if __name__ == "__main__":
+    main()
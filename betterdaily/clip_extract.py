@@ -0,0 +1,121 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from bisect import bisect_left, bisect_right
+from .ffmpeg_utils import ffmpeg_binary, keyframe_times, print_progress, progress_enabled
+
+"""
+clip_extract.py
+Writes many clips of one source video with a single ffmpeg invocation using the segment muxer.
+"copy" mode stream-copies and snaps every cut to the next keyframe; "accurate" mode re-encodes
+with keyframes forced at the cut points so clips start and end on the requested frames.
+"""
+
+EXTRACT_MODES = ("copy", "accurate")
+# Cut points are handed to the muxer this much before the keyframe they snap to, so rounding the
+# time to microseconds never pushes the cut past it.
+KEYFRAME_MARGIN = 0.0005
+
+def snap_to_keyframe(t, keyframes):
+    # The first keyframe at or after t, or None after the last one.
+    i = bisect_left(keyframes, t - KEYFRAME_MARGIN)
+    return keyframes[i] if i < len(keyframes) else None
+
+def segment_times(segments, offset=0.0, keyframes=None):
+    # The cut points handed to the segment muxer, the (start, end) cut of each segment and the
+    # piece it ends up in. A stream copy can only cut at a keyframe and the muxer cuts at most
+    # once per packet, so two cuts inside one GOP would collapse into one and shift every later
+    # piece. With a keyframe list, cuts are therefore moved to the keyframe the muxer will cut at
+    # and merged; a segment with no keyframe inside it gets no piece (None).
+    last_end = max(end for _, end, _ in segments)
+    cuts = []
+    for start, end, _ in segments:
+        if keyframes:
+            start = snap_to_keyframe(start, keyframes)
+            end = snap_to_keyframe(end, keyframes)
+        cuts.append((start, end))
+    boundaries = sorted({t for cut in cuts for t in cut if t is not None and offset < t < last_end} | {last_end})
+    pieces = [bisect_right(boundaries, cut[0]) if cut[0] is not None and cut[0] < end else None
+              for cut, (_, end, _) in zip(cuts, segments)]
+    return boundaries, cuts, pieces
+
+def build_command(video_path, boundaries, pattern, mode, offset=0.0):
+    margin = KEYFRAME_MARGIN if mode == "copy" else 0.0
+    times = ",".join(f"{max(t - offset - margin, 0.0):.6f}" for t in boundaries)
+    cmd = [ffmpeg_binary(), "-y", "-nostats", "-loglevel", "error", "-progress", "pipe:1"]
+    if offset > 0:
+        cmd += ["-ss", f"{offset:.6f}"]
+    cmd += ["-i", video_path, "-map", "0:v:0", "-map", "0:a?", "-t", f"{boundaries[-1] - offset:.6f}"]
+    if mode == "copy":
+        cmd += ["-c", "copy"]
+    else:
+        cmd += ["-c:v", "libx264", "-crf", "18", "-preset", "veryfast", "-c:a", "aac",
+                "-force_key_frames", times]
+    cmd += ["-f", "segment", "-segment_times", times, "-reset_timestamps", "1", pattern]
+    return cmd
+
+def extract_segments(video_path, segments, mode="copy"):
+    # segments is a list of (start_seconds, end_seconds, output_path) that do not overlap.
+    # Returns the wall-clock seconds spent on each output path.
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"Unknown extraction mode {mode!r}, expected one of {EXTRACT_MODES}")
+    segments = sorted(segments)
+    if not segments:
+        return {}
+    # Re-encoding everything before the first clip is wasted work; an input seek is accurate when
+    # transcoding, but would snap to a keyframe and shift every cut when stream-copying.
+    offset = segments[0][0] if mode == "accurate" else 0.0
+    keyframes = keyframe_times(video_path) if mode == "copy" else None
+    boundaries, cuts, pieces = segment_times(segments, offset, keyframes)
+    # Segments that no stream-copy cut can produce are re-encoded on their own.
+    unsplittable = [segment for segment, piece in zip(segments, pieces) if piece is None]
+    segments = [segment for segment, piece in zip(segments, pieces) if piece is not None]
+    cuts = [cut for cut, piece in zip(cuts, pieces) if piece is not None]
+    pieces = [piece for piece in pieces if piece is not None]
+    timings = {}
+    if unsplittable:
+        print(f"{len(unsplittable)} clips have no keyframe inside them; re-encoding them")
+        timings.update(extract_segments(video_path, unsplittable, "accurate"))
+    if not segments:
+        return timings
+
+    output_dir = os.path.dirname(os.path.abspath(segments[0][2]))
+    tmp_dir = tempfile.mkdtemp(prefix=".segments_", dir=output_dir)
+    extension = os.path.splitext(segments[0][2])[1] or ".mp4"
+    pattern = os.path.join(tmp_dir, f"piece_%05d{extension}")
+
+    # Progress reports carry the output position; note when each boundary is crossed so
+    # every clip gets its own timing even though a single process writes them all.
+    started = time.perf_counter()
+    crossed = {}
+    process = subprocess.Popen(build_command(video_path, boundaries, pattern, mode, offset),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    show_progress = progress_enabled()
+    report = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        report[key] = value
+        if key == "progress" and show_progress:
+            print_progress(os.path.basename(video_path), report)
+        if key == "out_time_us" and value.isdigit():
+            position = int(value) / 1e6 + offset
+            now = time.perf_counter() - started
+            for t in boundaries:
+                if t <= position:
+                    crossed.setdefault(t, now)
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise RuntimeError(f"ffmpeg failed to extract clips from {video_path}: {stderr.strip()}")
+    total = time.perf_counter() - started
+
+    for (start, end, output_path), (cut_start, cut_end), piece in zip(segments, cuts, pieces):
+        os.replace(pattern % piece, output_path)
+        begin = crossed.get(cut_start, 0.0) if cut_start > offset else 0.0
+        timings[output_path] = crossed.get(cut_end, total) - begin
+        print(f"{output_path}: {end - start:.2f}s clip in {timings[output_path]:.2f}s ({mode})")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"Extracted {len(segments)} clips in {total:.2f}s with one ffmpeg process.")
+    return timings
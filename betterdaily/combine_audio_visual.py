@@ -0,0 +1,164 @@
+import argparse
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import catalog
+from .ffmpeg_utils import ffmpeg_binary, media_info, probe_video
+from .overlays import overlay_png, render_with_overlay
+
+# Rough peak resident memory of one post render (one ffmpeg encoder), used to cap --jobs.
+MEMORY_PER_JOB_MB = 400
+OVERLAY_TEXT = "BetterDaily Tip"
+# Video codecs a post can carry without re-encoding.
+COPY_CODECS = ("h264",)
+# Audio formats that fit in an MP4 as they are; anything else is encoded to MP3.
+COPY_AUDIO_EXTENSIONS = (".mp3", ".m4a", ".aac")
+
+def can_stream_copy(visual_files):
+    # Only a single clip is stream-copied. Clips cut on keyframes start with pre-roll packets that
+    # their edit list hides (one B-frame delay, or seconds when the cut was snapped back to an
+    # earlier keyframe); the concat demuxer keeps those packets and offsets each file by its
+    # container duration, so chained clips overlap at every join and the DTS go backwards.
+    # Dropping the pre-roll needs a decode, so chains are rendered.
+    if len(visual_files) != 1:
+        return False
+    info = probe_video(visual_files[0])
+    return info is not None and info["codec"] in COPY_CODECS
+
+def mux_post(audio_file, visual_file, output_file, duration):
+    # Muxes the visual, stream-copied, with the audio and cuts both to duration. The clip is
+    # played from its start, which is a keyframe, and the end is cut on packet timestamps (the
+    # last few frames of the final GOP stay decodable), so no frame is decoded or encoded.
+    audio_codec = "copy" if audio_file.lower().endswith(COPY_AUDIO_EXTENSIONS) else "libmp3lame"
+    cmd = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", visual_file, "-i", audio_file,
+           "-map", "0:v:0", "-map", "1:a:0", "-t", f"{duration:.3f}",
+           "-c:v", "copy", "-c:a", audio_codec, "-f", "mp4", output_file]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to mux {output_file}: {result.stderr.strip()}")
+    return output_file
+
+def render_post(audio_file, visual_files, output_file, threads=None, overlay=True):
+    # visual_files is one visual or a list of clips chained to cover the audio.
+    # Render into a temporary file next to the output and rename it once complete, so an
+    # interrupted or failed render never leaves a truncated post behind.
+    # Without the overlay, a single H.264 visual is muxed without re-encoding.
+    if isinstance(visual_files, str):
+        visual_files = [visual_files]
+    tmp_file = os.path.splitext(output_file)[0] + ".part.mp4"
+    duration = media_info(audio_file)["duration"]
+
+    try:
+        if not overlay and can_stream_copy(visual_files):
+            mux_post(audio_file, visual_files[0], tmp_file, duration)
+        else:
+            size = media_info(visual_files[0])["video_size"]
+            overlay_file = None
+            if overlay:
+                overlay_file = overlay_png(OVERLAY_TEXT, size, fontsize=70, color='white', bg_color='black')
+            render_with_overlay(visual_files, audio_file, overlay_file, tmp_file, duration, fps=24,
+                                threads=threads, size=size)
+        os.replace(tmp_file, output_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return output_file
+
+def render_post_with_retries(audio_file, visual_files, output_file, retries=1, threads=None, overlay=True):
+    for attempt in range(retries + 1):
+        try:
+            return render_post(audio_file, visual_files, output_file, threads, overlay)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"Rendering {output_file} failed ({e}), retrying ({attempt + 1}/{retries})")
+
+def worker_count(jobs, max_memory_mb=None):
+    if max_memory_mb:
+        jobs = min(jobs, max(1, max_memory_mb // MEMORY_PER_JOB_MB))
+    return max(1, jobs)
+
+def plan_posts(audio_files, clips, output_dir, category=None):
+    # Returns (audio_file, visual_files, output_file) for every post. clips are catalog rows;
+    # each post gets a clip long enough for its audio, or several chained, preferring category.
+    # The pick depends only on the post's own audio file, so editing one post never re-assigns
+    # the visuals of the others.
+    posts = []
+    for i, audio_file in enumerate(audio_files):
+        duration = media_info(audio_file)["duration"]
+        seed = os.path.basename(audio_file)
+        visual_files = [clip["path"] for clip in catalog.choose_visuals(clips, duration, category, seed)]
+        output_file = os.path.join(output_dir, f'BetterDaily_Post_{i+1}.mp4')
+        posts.append((audio_file, visual_files, output_file))
+    return posts
+
+def combine_audio_visual(audio_dir, visual_dir, output_dir, jobs=1, max_memory_mb=None, retries=1,
+                         category=None, catalog_path=catalog.DEFAULT_CATALOG_PATH, overlay=True):
+    os.makedirs(output_dir, exist_ok=True)
+
+    conn = catalog.open_catalog(catalog_path)
+    clips = catalog.refresh_dir(conn, visual_dir)
+    conn.close()
+    audio_files = sorted([f for f in os.listdir(audio_dir) if f.endswith('.mp3')])
+
+    if not clips:
+        print(f"No visual files found in {visual_dir}")
+        return
+
+    if not audio_files:
+        print(f"No audio files found in {audio_dir}")
+        return
+
+    posts = plan_posts([os.path.join(audio_dir, f) for f in audio_files], clips, output_dir, category)
+
+    failed = []
+    workers = worker_count(jobs, max_memory_mb)
+    if workers == 1:
+        for audio_file, visual_files, output_file in posts:
+            try:
+                render_post_with_retries(audio_file, visual_files, output_file, retries, overlay=overlay)
+                print(f"Created {output_file}")
+            except Exception as e:
+                failed.append(output_file)
+                print(f"Failed to create {output_file}: {e}")
+    else:
+        # Each render also runs an ffmpeg encoder, so split the cores between the jobs.
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(render_post_with_retries, *post, retries, threads, overlay): post[2]
+                       for post in posts}
+            for future in as_completed(futures):
+                output_file = futures[future]
+                try:
+                    future.result()
+                    print(f"Created {output_file}")
+                except Exception as e:
+                    failed.append(output_file)
+                    print(f"Failed to create {output_file}: {e}")
+
+    if failed:
+        print(f"{len(failed)} of {len(posts)} posts failed: {', '.join(sorted(failed))}")
+    else:
+        print("All posts have been created.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Combine audio clips with visual clips into posts.")
+    parser.add_argument("audio_dir")
+    parser.add_argument("visual_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of posts rendered at once (default: 1)")
+    parser.add_argument("--max-memory", type=int, default=None,
+                        help=f"Memory budget in MB; each job is assumed to need {MEMORY_PER_JOB_MB} MB")
+    parser.add_argument("--retries", type=int, default=1, help="Retries for a failed post (default: 1)")
+    parser.add_argument("--category", default=None,
+                        help="Prefer visuals of this category (training, fight, struggle, victory)")
+    parser.add_argument("--catalog", default=catalog.DEFAULT_CATALOG_PATH,
+                        help="Visual clip catalog file (default: %(default)s)")
+    parser.add_argument("--no-overlay", action="store_true",
+                        help="Leave out the text overlay; H.264 visuals are then muxed without re-encoding")
+    args = parser.parse_args(argv)
+    combine_audio_visual(args.audio_dir, args.visual_dir, args.output_dir, args.jobs, args.max_memory, args.retries,
+                         args.category, args.catalog, not args.no_overlay)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import codecs
+import importlib
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+
+"""
+daemon.py
+Long-lived process that runs BetterDaily commands. It imports the command modules and loads the
+models they use (the face cascade, MoviePy's configuration and text rendering) once, then forks
+a worker for each job it is sent over a Unix socket. The worker inherits everything already
+loaded, runs the job in the client's working directory and environment and writes its output,
+along with that of the ffmpeg processes it starts, straight to the client's socket. Jobs run
+side by side, each in its own process group; when a client disconnects (it was cancelled or
+killed) the daemon stops that job's group. A new interpreter per job pays those imports on every
+short post render; the daemon pays them once.
+"""
+
+SOCKET_PATH = os.path.expanduser("~/.cache/betterdaily/daemon.sock")
+# Modules imported when the daemon starts.
+WARM_MODULES = ("vidtoclips", "visuals", "batch", "combine_audio_visual", "pipeline", "transcribe", "audioseg",
+                "extract_frames")
+# Sent after a job's output, followed by its exit status. Job output never contains NUL.
+EXIT_MARKER = "\0exit "
+# Seconds a job whose client disconnected gets to exit before its process group is killed.
+CANCEL_TIMEOUT = 5
+# Seconds between checks for finished workers.
+POLL_INTERVAL = 0.5
+# Seconds a client gets to send its request after connecting.
+REQUEST_TIMEOUT = 10
+
+def available():
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "fork")
+
+def warm():
+    for name in WARM_MODULES:
+        importlib.import_module(f"betterdaily.{name}")
+    from . import detectors, ffmpeg_utils
+    detectors.face_cascade()
+    ffmpeg_utils.ffmpeg_binary()
+    importlib.import_module("moviepy.editor")
+    importlib.import_module("speech_recognition")
+
+def run_command(command, argv):
+    # Runs command's main(argv) in this process and returns its exit status.
+    module = importlib.import_module(f"betterdaily.{command}")
+    # argv[0] names the command in usage and error messages.
+    saved_argv = sys.argv
+    sys.argv = [f"betterdaily {command}"] + list(argv)
+    try:
+        module.main(list(argv))
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv = saved_argv
+    return 0
+
+def reply(conn, status):
+    try:
+        conn.sendall(f"{EXIT_MARKER}{status}\n".encode())
+    except OSError:
+        pass
+
+def run_worker(conn, request, inherited):
+    # Runs in the forked child and never returns. The job gets its own session, so the daemon can
+    # signal it together with everything it starts, and the client's socket as stdout and stderr.
+    status = 1
+    try:
+        os.setsid()
+        for obj in inherited:
+            obj.close()
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        conn.close()
+        sys.stdout = open(1, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+        try:
+            status = run_command(request["command"], request["argv"])
+        except Exception:
+            traceback.print_exc()
+        # The client hangs up as soon as it has the exit status; that is not a cancel.
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        sys.stdout.write(f"{EXIT_MARKER}{status}\n")
+        sys.stdout.flush()
+    except BaseException:
+        # The client went away or the job was interrupted; there is nobody left to tell.
+        pass
+    finally:
+        os._exit(status)
+
+def signal_group(pid, sig):
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+
+def reap(workers, selector):
+    # Closes the connections of workers that have exited; their clients then see the end of the
+    # output even if the job died before writing its exit status.
+    for pid, worker in list(workers.items()):
+        done, wait_status = os.waitpid(pid, os.WNOHANG)
+        if done == 0:
+            continue
+        if worker["conn"] is not None:
+            selector.unregister(worker["conn"])
+            worker["conn"].close()
+        del workers[pid]
+        status = os.waitstatus_to_exitcode(wait_status)
+        print(f"Cancelled {worker['name']}" if status < 0 else f"Finished {worker['name']} (exit status {status})")
+
+def serve(socket_path=SOCKET_PATH):
+    if send("ping", [], socket_path, quiet=True) is not None:
+        print(f"A daemon is already listening on {socket_path}")
+        return 1
+    warm()
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    server.listen()
+    print(f"Listening on {socket_path}")
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    # Connections whose request line is still arriving: conn -> {"data", "deadline"}. Requests are
+    # read as they come in, so a client that connects and sends nothing holds up no one else.
+    pending = {}
+    # pid -> {"conn", "name", "deadline"}. conn is None once the client has gone; deadline is when
+    # what is left of a cancelled job is killed.
+    workers = {}
+    listening = True
+    try:
+        # After `stop` the daemon accepts nothing new but still watches the jobs already running.
+        while listening or workers or pending:
+            for key, _ in selector.select(POLL_INTERVAL):
+                if key.fileobj is server:
+                    conn, _ = server.accept()
+                    conn.setblocking(False)
+                    pending[conn] = {"data": b"", "deadline": time.monotonic() + REQUEST_TIMEOUT}
+                    selector.register(conn, selectors.EVENT_READ)
+                elif key.fileobj in pending:
+                    conn = key.fileobj
+                    try:
+                        chunk = conn.recv(65536)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        chunk = b""
+                    pending[conn]["data"] += chunk
+                    if chunk and b"\n" not in chunk:
+                        continue
+                    selector.unregister(conn)
+                    line = pending.pop(conn)["data"].partition(b"\n")[0]
+                    if not chunk:
+                        conn.close()
+                        continue
+                    conn.setblocking(True)
+                    request = json.loads(line)
+                    if request["command"] in ("ping", "stop"):
+                        reply(conn, 0)
+                        conn.close()
+                        if request["command"] == "stop":
+                            listening = False
+                            selector.unregister(server)
+                            server.close()
+                            os.remove(socket_path)
+                            print(f"Stopping once the {len(workers)} running jobs finish")
+                        continue
+                    name = f"{request['command']} {' '.join(request['argv'])}".strip()
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    pid = os.fork()
+                    if pid == 0:
+                        others = [worker["conn"] for worker in workers.values() if worker["conn"]] + list(pending)
+                        run_worker(conn, request, [server, selector] + others)
+                    print(f"Running {name} (pid {pid})")
+                    workers[pid] = {"conn": conn, "name": name, "deadline": None}
+                    selector.register(conn, selectors.EVENT_READ, pid)
+                else:
+                    # Clients send nothing after the request, so a readable connection means the
+                    # client closed it.
+                    worker = workers[key.data]
+                    try:
+                        gone = not key.fileobj.recv(1024)
+                    except OSError:
+                        gone = True
+                    if gone:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                        worker["conn"] = None
+                        worker["deadline"] = time.monotonic() + CANCEL_TIMEOUT
+                        signal_group(key.data, signal.SIGTERM)
+            for conn, request in list(pending.items()):
+                if time.monotonic() > request["deadline"]:
+                    selector.unregister(conn)
+                    conn.close()
+                    del pending[conn]
+            for pid, worker in workers.items():
+                if worker["deadline"] is not None and time.monotonic() > worker["deadline"]:
+                    signal_group(pid, signal.SIGKILL)
+                    worker["deadline"] = None
+            reap(workers, selector)
+    except KeyboardInterrupt:
+        for pid in workers:
+            signal_group(pid, signal.SIGTERM)
+    finally:
+        if listening:
+            server.close()
+            os.remove(socket_path)
+    return 0
+
+def send(command, argv, socket_path=SOCKET_PATH, quiet=False):
+    # Runs command on the daemon, copying its output to this process's stdout. Returns the exit
+    # status, or None when no daemon is listening.
+    if not available() or not os.path.exists(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    with client:
+        request = {"command": command, "argv": list(argv), "cwd": os.getcwd(), "env": dict(os.environ)}
+        client.sendall((json.dumps(request) + "\n").encode())
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        pending = ""
+        # The daemon holds its end of the connection until it reaps the worker, so the exit
+        # status, not the end of the stream, marks the end of the job.
+        while not (pending.startswith(EXIT_MARKER) and pending.endswith("\n")):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            pending += decoder.decode(chunk)
+            # Output is passed on as it arrives, holding back only what may be the exit marker.
+            cut = pending.find("\0")
+            output, pending = (pending, "") if cut == -1 else (pending[:cut], pending[cut:])
+            if output and not quiet:
+                sys.stdout.write(output)
+                sys.stdout.flush()
+    if not pending.startswith(EXIT_MARKER):
+        return 1
+    return int(pending[len(EXIT_MARKER):].strip() or 1)
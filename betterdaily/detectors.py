@@ -0,0 +1,261 @@
+import threading
+import time
+import numpy as np
+
+"""
+detectors.py
+Registry of the detectors that label key frames (training, fight, struggle, victory). Each
+detector names the label it votes for, the features it reads and the cost of its own test;
+each feature declares its cost and the features it is computed from. Features are computed
+lazily, once per batch, and shared by every detector that needs them, so a frame only pays
+for what is measured before its label is decided.
+
+Labels keep their priority: the first label with a matching detector wins. Within a label,
+detectors run cheapest per expected hit first, using the declared cost of the features still
+missing for the batch and the hit rate observed so far. Each detector only sees the frames no
+earlier check has decided, so adding one does not slow down frames that are labelled before it.
+"""
+
+# Key frames are classified at this width; colour fractions and brightness barely change with
+# size, and the Canny edge count is rescaled to the source resolution.
+ANALYSIS_WIDTH = 480
+# Bump whenever a feature changes what it measures, or one is added, so cached features are
+# recomputed. Thresholds are applied to cached features on every run and need no bump.
+CLASSIFIER_VERSION = 1
+
+RED_HSV_RANGES = (
+    (np.array([0, 120, 70], np.uint8), np.array([10, 255, 255], np.uint8)),
+    (np.array([170, 120, 70], np.uint8), np.array([180, 255, 255], np.uint8)),
+)
+RED_FRACTION_THRESHOLD = 0.01
+EDGE_PIXELS_THRESHOLD = 1000
+BRIGHTNESS_THRESHOLD = 200
+DEFAULT_LABEL = "other"
+
+# Feature name -> {"cost", "needs", "batched", "measure", "compute"}. Costs are rough
+# milliseconds per 480-pixel-wide frame; only their ratios matter.
+FEATURES = {}
+# Labels in priority order, and label -> its detectors.
+LABELS = []
+DETECTORS = {}
+# Detector name -> {"label", "frames", "hits", "seconds"}, accumulated over the process.
+STATS = {}
+stats_lock = threading.Lock()
+
+def register_feature(name, cost, needs=(), batched=False, measure=True):
+    # Decorator for compute(batch, indices, **needs) returning the feature for frames indices.
+    # A batched feature is computed for the whole batch in one call the first time it is needed;
+    # the others are computed per frame, for the frames that ask. Measures are per-frame numbers
+    # returned by extract_features and cached; the rest are shared intermediates like the gray
+    # image.
+    def decorator(compute):
+        FEATURES[name] = {"cost": cost, "needs": tuple(needs), "batched": batched, "measure": measure,
+                          "compute": compute}
+        return compute
+    return decorator
+
+def register_detector(name, label, needs, cost=0.0):
+    # Decorator for test(**features) returning a boolean array. NaN features must not match:
+    # they stand for measures that were skipped or are missing from the cache.
+    def decorator(test):
+        if label not in DETECTORS:
+            LABELS.append(label)
+            DETECTORS[label] = []
+        DETECTORS[label].append({"name": name, "label": label, "needs": tuple(needs), "cost": cost, "test": test})
+        with stats_lock:
+            STATS.setdefault(name, {"label": label, "frames": 0, "hits": 0, "seconds": 0.0})
+        return test
+    return decorator
+
+_face_cascade = None
+
+def face_cascade():
+    import cv2
+    # Loaded on first use, so importing the classifier does not read the cascade file.
+    global _face_cascade
+    if _face_cascade is None:
+        _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    return _face_cascade
+
+def analysis_frame(frame):
+    import cv2
+    if frame.shape[1] <= ANALYSIS_WIDTH:
+        return frame
+    height = round(frame.shape[0] * ANALYSIS_WIDTH / frame.shape[1])
+    return cv2.resize(frame, (ANALYSIS_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+def tall_image(batch):
+    # The batch stacked into one tall image, so each colour conversion is a single call.
+    n, h, w = batch["frames"].shape[:3]
+    return batch["frames"].reshape(n * h, w, 3)
+
+@register_feature("hsv", 0.3, batched=True, measure=False)
+def hsv_feature(batch, indices):
+    import cv2
+    return cv2.cvtColor(tall_image(batch), cv2.COLOR_BGR2HSV).reshape(batch["frames"].shape)
+
+@register_feature("gray", 0.1, batched=True, measure=False)
+def gray_feature(batch, indices):
+    import cv2
+    return cv2.cvtColor(tall_image(batch), cv2.COLOR_BGR2GRAY).reshape(batch["frames"].shape[:3])
+
+@register_feature("red_fraction", 0.2, needs=("hsv",), batched=True)
+def red_fraction_feature(batch, indices, hsv):
+    import cv2
+    n, h, w = hsv.shape[:3]
+    tall = hsv.reshape(n * h, w, 3)
+    mask = cv2.inRange(tall, *RED_HSV_RANGES[0]) | cv2.inRange(tall, *RED_HSV_RANGES[1])
+    return np.count_nonzero(mask.reshape(n, -1), axis=1) / (h * w)
+
+@register_feature("brightness", 0.05, needs=("gray",), batched=True)
+def brightness_feature(batch, indices, gray):
+    return gray.reshape(len(gray), -1).mean(axis=1)
+
+@register_feature("edge_pixels", 1.0, needs=("gray",))
+def edge_pixels_feature(batch, indices, gray):
+    import cv2
+    # Edges are thin lines, so their pixel count scales with the linear size of the frame.
+    return np.array([cv2.countNonZero(cv2.Canny(image, 50, 150, apertureSize=3)) for image in gray],
+                    dtype=float) * batch["edge_scale"]
+
+@register_feature("faces", 12.0, needs=("gray",))
+def faces_feature(batch, indices, gray):
+    cascade = face_cascade()
+    return np.array([len(cascade.detectMultiScale(image, scaleFactor=1.1, minNeighbors=5)) for image in gray],
+                    dtype=float)
+
+@register_detector("red_training", "training", ("red_fraction",))
+def red_training(red_fraction):
+    return red_fraction > RED_FRACTION_THRESHOLD
+
+@register_detector("edge_fight", "fight", ("edge_pixels",))
+def edge_fight(edge_pixels):
+    return edge_pixels > EDGE_PIXELS_THRESHOLD
+
+@register_detector("face_struggle", "struggle", ("faces",))
+def face_struggle(faces):
+    return faces > 0
+
+@register_detector("bright_victory", "victory", ("brightness",))
+def bright_victory(brightness):
+    return brightness > BRIGHTNESS_THRESHOLD
+
+def new_batch(frames, source_width=None):
+    # Frames must share one shape once downscaled for analysis.
+    stack = np.stack([analysis_frame(frame) for frame in frames])
+    return {"n": len(frames), "frames": stack, "values": {}, "done": {},
+            "edge_scale": (source_width or frames[0].shape[1]) / stack.shape[2]}
+
+def feature(batch, name, indices):
+    # Returns the values of feature name for the frames indices (sorted, unique), computing
+    # only those not known yet. A batch built from stored features has no frames and only
+    # returns what it holds.
+    n = batch["n"]
+    values = batch["values"].get(name)
+    if batch["frames"] is None:
+        return np.full(len(indices), np.nan) if values is None else values[indices]
+
+    spec = FEATURES[name]
+    if spec["batched"]:
+        if values is None:
+            everything = np.arange(n)
+            inputs = {need: feature(batch, need, everything) for need in spec["needs"]}
+            values = batch["values"][name] = spec["compute"](batch, everything, **inputs)
+            batch["done"][name] = np.ones(n, dtype=bool)
+    else:
+        if values is None:
+            values = batch["values"][name] = np.full(n, np.nan)
+            batch["done"][name] = np.zeros(n, dtype=bool)
+        done = batch["done"][name]
+        todo = indices[~done[indices]]
+        if len(todo):
+            inputs = {need: feature(batch, need, todo) for need in spec["needs"]}
+            values[todo] = spec["compute"](batch, todo, **inputs)
+            done[todo] = True
+    return values if len(indices) == n else values[indices]
+
+def pending_cost(batch, names, counted=None):
+    # Declared cost of the features in names, and of those they are computed from, that the
+    # batch does not hold yet. Per-frame features already computed for some frames count in
+    # full; the estimate only has to rank detectors.
+    counted = set() if counted is None else counted
+    if batch["frames"] is None:
+        return 0.0
+    cost = 0.0
+    for name in names:
+        if name in counted or (name in batch["values"] and FEATURES[name]["batched"]):
+            continue
+        counted.add(name)
+        cost += FEATURES[name]["cost"] + pending_cost(batch, FEATURES[name]["needs"], counted)
+    return cost
+
+def detector_order(batch, detectors):
+    # Cheapest per expected hit first. The hit rate starts at one half and follows the counts.
+    def expected_cost(detector):
+        stats = STATS[detector["name"]]
+        hit_rate = (stats["hits"] + 1) / (stats["frames"] + 2)
+        return (detector["cost"] + pending_cost(batch, detector["needs"])) / hit_rate
+    return sorted(detectors, key=expected_cost)
+
+def evaluate(batch, record=True):
+    # Returns the label of every frame in the batch. record adds the frames tested, hits and
+    # time (including the features a detector had to compute) to STATS.
+    labels = np.full(batch["n"], DEFAULT_LABEL, dtype=object)
+    undecided = np.arange(batch["n"])
+    for label in LABELS:
+        remaining = undecided
+        for detector in detector_order(batch, DETECTORS[label]):
+            if not len(remaining):
+                break
+            start = time.perf_counter()
+            inputs = {name: feature(batch, name, remaining) for name in detector["needs"]}
+            hits = np.asarray(detector["test"](**inputs), dtype=bool)
+            if record:
+                with stats_lock:
+                    stats = STATS[detector["name"]]
+                    stats["frames"] += len(remaining)
+                    stats["hits"] += int(np.count_nonzero(hits))
+                    stats["seconds"] += time.perf_counter() - start
+            labels[remaining[hits]] = label
+            remaining = remaining[~hits]
+        undecided = remaining
+        if not len(undecided):
+            break
+    return labels.astype(str)
+
+def measures():
+    return [name for name, spec in FEATURES.items() if spec["measure"]]
+
+def extract_features(frames, source_width=None, lazy=True):
+    # Computes the per-frame measures the detector thresholds are applied to. With lazy=True
+    # measures no detector needed for a frame are left as NaN; otherwise every measure is
+    # computed, so the result can be cached and relabelled with other thresholds.
+    batch = new_batch(frames, source_width)
+    evaluate(batch)
+    if not lazy:
+        everything = np.arange(batch["n"])
+        for name in measures():
+            feature(batch, name, everything)
+    return {name: batch["values"].get(name, np.full(batch["n"], np.nan)) for name in measures()}
+
+def labels_from_features(features):
+    # Labels frames from stored measures. Measures the stored ones lack count as NaN.
+    n = len(next(iter(features.values()))) if features else 0
+    batch = {"n": n, "frames": None, "done": {},
+             "values": {name: np.asarray(values, dtype=float) for name, values in features.items()}}
+    return evaluate(batch, record=False)
+
+def reset_stats():
+    with stats_lock:
+        for stats in STATS.values():
+            stats.update(frames=0, hits=0, seconds=0.0)
+
+def stats_report():
+    # One line per detector that ran: frames tested, hit rate and time per tested frame.
+    lines = [f"{'detector':<16} {'label':<10} {'frames':>7} {'hit rate':>9} {'ms/frame':>9}"]
+    with stats_lock:
+        for name, stats in STATS.items():
+            if stats["frames"]:
+                lines.append(f"{name:<16} {stats['label']:<10} {stats['frames']:>7} "
+                             f"{stats['hits'] / stats['frames']:>9.1%} {stats['seconds'] / stats['frames'] * 1000:>9.2f}")
+    return "\n".join(lines)
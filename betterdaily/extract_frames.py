@@ -0,0 +1,125 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from . import frame_dataset
+
+# Intervals (in seconds) at or above which "auto" sampling seeks to each sample instead of
+# grabbing every frame in between; a seek decodes from the previous keyframe, so it only pays
+# off once the gap between samples is longer than a typical GOP.
+SEEK_INTERVAL = 10.0
+SAMPLE_METHODS = ("auto", "grab", "seek")
+WRITE_WORKERS = 4
+OUTPUT_FORMATS = ("jpg", "npy")
+
+def grab_samples(cap, interval):
+    import cv2
+    # Grabs (demuxes and decodes) every frame but only converts the sampled ones. Frames are
+    # picked by their timestamp, so sub-second intervals and variable frame rates are exact.
+    next_time = 0.0
+    while cap.grab():
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if timestamp + 1e-6 < next_time:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        yield timestamp, frame
+        while next_time <= timestamp + 1e-6:
+            next_time += interval
+
+def seek_samples(cap, interval):
+    import cv2
+    # Seeks straight to each sample time. OpenCV maps the time to a frame number with the
+    # average frame rate, so on variable-frame-rate sources the samples are approximate.
+    frame_rate = cap.get(cv2.CAP_PROP_FPS)
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    duration = frames / frame_rate if frame_rate > 0 and frames > 0 else None
+    sample = 0
+    last_timestamp = -1.0
+    while duration is None or sample * interval < duration:
+        cap.set(cv2.CAP_PROP_POS_MSEC, sample * interval * 1000)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if timestamp > last_timestamp:
+            yield timestamp, frame
+            last_timestamp = timestamp
+        sample += 1
+
+def sample_frames(video_path, interval=30, method="auto"):
+    import cv2
+    # Yields (timestamp in seconds, frame) for one frame every interval seconds.
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Unknown sampling method {method!r}, expected one of {', '.join(SAMPLE_METHODS)}")
+    if method == "auto":
+        method = "seek" if interval >= SEEK_INTERVAL else "grab"
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if method == "seek":
+            yield from seek_samples(cap, interval)
+        else:
+            yield from grab_samples(cap, interval)
+    finally:
+        cap.release()
+
+def extract_frames(video_path, output_folder, interval=30, method="auto", workers=WRITE_WORKERS):
+    import cv2
+    os.makedirs(output_folder, exist_ok=True)
+    frame_count = 0
+
+    # JPEG encoding releases the GIL, so writes run on a thread pool while the next frames are
+    # decoded. At most 2 * workers frames wait to be written at any time.
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _, frame in sample_frames(video_path, interval, method):
+            frame_path = os.path.join(output_folder, f"frame_{frame_count}.jpg")
+            pending.append(executor.submit(cv2.imwrite, frame_path, frame))
+            frame_count += 1
+            if len(pending) >= 2 * workers:
+                pending.popleft().result()
+        while pending:
+            pending.popleft().result()
+
+    print(f"Extracted {frame_count} frames from the video.")
+
+def extract_to_dataset(video_path, dataset_dir, interval=30, method="auto", scenes=None,
+                       frame_size=frame_dataset.DEFAULT_FRAME_SIZE):
+    # Appends the sampled frames, downscaled, to the memory-mapped frame dataset in dataset_dir.
+    # scenes is an optional list of (start_seconds, end_seconds) used to fill in scene ids.
+    def records():
+        for timestamp, frame in sample_frames(video_path, interval, method):
+            scene = frame_dataset.scene_ids([timestamp], scenes)[0] if scenes else -1
+            yield frame, video_path, timestamp, scene, ""
+
+    added = frame_dataset.append_frames(dataset_dir, records(), frame_size)
+    print(f"Extracted {added} frames from the video into {dataset_dir}.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract frames from a video at a fixed interval.")
+    parser.add_argument("video_path")
+    parser.add_argument("output_folder")
+    parser.add_argument("interval", nargs="?", type=float, default=30, help="Seconds between frames (default: 30)")
+    parser.add_argument("method", nargs="?", choices=SAMPLE_METHODS, default="auto")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jpg",
+                        help="jpg writes frame_N.jpg files; npy appends to a memory-mapped frame dataset")
+    parser.add_argument("--size", type=frame_dataset.parse_size, default=frame_dataset.DEFAULT_FRAME_SIZE,
+                        help="Frame size as WIDTHxHEIGHT for --format npy (default: 224x224)")
+    parser.add_argument("--scenes", action="store_true",
+                        help="Detect scenes and record each frame's scene id (--format npy)")
+    args = parser.parse_args(argv)
+    if args.format == "npy":
+        scenes = None
+        if args.scenes:
+            from .scenes import detect_scenes
+            scenes = [(start.get_seconds(), end.get_seconds()) for start, end in detect_scenes(args.video_path)]
+        extract_to_dataset(args.video_path, args.output_folder, args.interval, args.method, scenes, args.size)
+    else:
+        extract_frames(args.video_path, args.output_folder, args.interval, args.method)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import functools
+import os
+import re
+import subprocess
+
+# MoviePy is imported on first use: loading its configuration costs a few hundred milliseconds,
+# which short jobs that never touch ffmpeg should not pay.
+
+# Set to 1 by the GUI's job runner. Long ffmpeg runs then print a progress line (position, fps,
+# speed) ended by \r, which the job list shows as the job's progress and rate.
+PROGRESS_ENV = "BETTERDAILY_PROGRESS"
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_binary():
+    # Use the same ffmpeg MoviePy is configured with.
+    from moviepy.config import get_setting
+    return get_setting("FFMPEG_BINARY")
+
+def progress_enabled():
+    return os.environ.get(PROGRESS_ENV) == "1"
+
+def print_progress(label, report):
+    # report holds the key=value pairs of the latest -progress block.
+    print(f"{label}: time={report.get('out_time', '?')} fps={report.get('fps', '?')} "
+          f"speed={report.get('speed', '?').strip()}", end="\r", flush=True)
+
+def run_ffmpeg(cmd, label):
+    # Runs an ffmpeg command that writes nothing to stdout and returns (return code, stderr).
+    # With progress enabled, ffmpeg's -progress reports are read from stdout and printed.
+    if not progress_enabled():
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        return result.returncode, result.stderr
+    process = subprocess.Popen(cmd[:1] + ["-nostats", "-progress", "pipe:1"] + cmd[1:],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    report = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        report[key] = value
+        if key == "progress":
+            print_progress(label, report)
+    stderr = process.stderr.read()
+    return process.wait(), stderr
+
+def keyframe_times(video_path):
+    # Times of the keyframes of the first video stream, on the timeline ffmpeg outputs (the one the
+    # segment muxer cuts on). The packets are stream-copied to framecrc, which flags every packet
+    # that is not a plain keyframe with F=; no frame is decoded.
+    result = subprocess.run(
+        [ffmpeg_binary(), "-v", "error", "-i", video_path, "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True, text=True)
+    if result.returncode != 0:
+        return []
+    time_base = None
+    times = []
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            num, den = line.split(":", 1)[1].strip().split("/")
+            time_base = int(num) / int(den)
+        elif time_base and not line.startswith("#"):
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) >= 6 and not any(field.startswith("F=") for field in fields[6:]):
+                times.append(int(fields[2]) * time_base)
+    return sorted(times)
+
+def media_info(path):
+    # Duration, size and fps as parsed by MoviePy from `ffmpeg -i`, without decoding any frame.
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    return ffmpeg_parse_infos(path)
+
+def probe_video(path):
+    # Duration, size, fps, codec, codec profile and pixel format of the first video stream from a
+    # single `ffmpeg -i` run. Returns None when the file has no video stream.
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", path], capture_output=True, text=True)
+    stream = re.search(r"Stream #\S+.*?: Video: (\w+)(?: \(([^)]*)\))?.*?, (\w+)(?:\([^)]*\))?, (\d+)x(\d+)",
+                       result.stderr)
+    if stream is None:
+        return None
+    duration = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+    fps = re.search(r"([\d.]+) (?:fps|tbr)", result.stderr[stream.start():])
+    return {
+        "duration": (int(duration.group(1)) * 3600 + int(duration.group(2)) * 60
+                     + float(duration.group(3))) if duration else None,
+        "width": int(stream.group(4)),
+        "height": int(stream.group(5)),
+        "fps": float(fps.group(1)) if fps else None,
+        "codec": stream.group(1),
+        "profile": stream.group(2),
+        "pix_fmt": stream.group(3),
+    }
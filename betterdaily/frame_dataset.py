@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import re
+import numpy as np
+
+"""
+frame_dataset.py
+A compact frame store for model training. Frames are downscaled to a fixed size and written
+into fixed-length .npy shards (shard_00000.npy, ...) of shape (shard_size, height, width, 3),
+BGR uint8, which training code can open zero-copy with np.load(path, mmap_mode="r").
+index.jsonl has one line per frame, in storage order, with the source video, timestamp (seconds),
+scene id and label; meta.json records the frame size and shard length. Row i of the dataset is
+row i % shard_size of shard i // shard_size. Appending continues in the last shard.
+"""
+
+DEFAULT_FRAME_SIZE = (224, 224)  # (width, height)
+DEFAULT_SHARD_SIZE = 4096
+META_FILE = "meta.json"
+INDEX_FILE = "index.jsonl"
+
+def shard_path(dataset_dir, shard):
+    return os.path.join(dataset_dir, f"shard_{shard:05d}.npy")
+
+def load_meta(dataset_dir):
+    path = os.path.join(dataset_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def load_index(dataset_dir):
+    path = os.path.join(dataset_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def init_dataset(dataset_dir, frame_size=DEFAULT_FRAME_SIZE, shard_size=DEFAULT_SHARD_SIZE):
+    # Returns the dataset's meta, creating the dataset if needed. An existing dataset keeps its
+    # own frame size and shard length.
+    meta = load_meta(dataset_dir)
+    if meta is not None:
+        if tuple(meta["frame_size"]) != tuple(frame_size):
+            print(f"{dataset_dir} stores {meta['frame_size'][0]}x{meta['frame_size'][1]} frames, "
+                  f"frames are resized to that instead.")
+        return meta
+    os.makedirs(dataset_dir, exist_ok=True)
+    meta = {"version": 1, "frame_size": list(frame_size), "shard_size": shard_size,
+            "dtype": "uint8", "channels": "BGR"}
+    with open(os.path.join(dataset_dir, META_FILE), "w") as file:
+        json.dump(meta, file, indent=2)
+    return meta
+
+def append_frames(dataset_dir, records, frame_size=DEFAULT_FRAME_SIZE, shard_size=DEFAULT_SHARD_SIZE):
+    import cv2
+    # records yields (frame, video, timestamp, scene_id, label); returns the number appended.
+    # Index lines are only written after their shard has been flushed, so an interrupted append
+    # never indexes frames that are not on disk.
+    meta = init_dataset(dataset_dir, frame_size, shard_size)
+    width, height = meta["frame_size"]
+    shard_size = meta["shard_size"]
+    count = len(load_index(dataset_dir))
+
+    shard = None
+    pending = []
+    added = 0
+
+    def flush():
+        if shard is not None:
+            shard.flush()
+        with open(os.path.join(dataset_dir, INDEX_FILE), "a") as file:
+            file.writelines(json.dumps(entry) + "\n" for entry in pending)
+        pending.clear()
+
+    for frame, video, timestamp, scene_id, label in records:
+        shard_number, row = divmod(count, shard_size)
+        if shard is None or row == 0:
+            flush()
+            path = shard_path(dataset_dir, shard_number)
+            if row == 0 or not os.path.exists(path):
+                shard = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8,
+                                                  shape=(shard_size, height, width, 3))
+            else:
+                shard = np.load(path, mmap_mode="r+")
+        if frame.shape[:2] != (height, width):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        shard[row] = frame
+        pending.append({"video": video, "timestamp": timestamp, "scene": scene_id, "label": label})
+        count += 1
+        added += 1
+    flush()
+    return added
+
+def open_dataset(dataset_dir):
+    # Returns (meta, index, shards), with the shards memory-mapped read-only.
+    meta = load_meta(dataset_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No frame dataset in {dataset_dir}")
+    index = load_index(dataset_dir)
+    shard_count = -(-len(index) // meta["shard_size"])
+    shards = [np.load(shard_path(dataset_dir, i), mmap_mode="r") for i in range(shard_count)]
+    return meta, index, shards
+
+def get_frame(dataset, i):
+    meta, index, shards = dataset
+    if not 0 <= i < len(index):
+        raise IndexError(i)
+    return shards[i // meta["shard_size"]][i % meta["shard_size"]]
+
+def scene_ids(timestamps, scenes):
+    # Maps each timestamp to the number of the scene containing it (-1 outside every scene).
+    # scenes is a list of (start_seconds, end_seconds) in order.
+    if not scenes:
+        return [-1] * len(timestamps)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    starts = np.array([start for start, _ in scenes], dtype=np.float64)
+    ends = np.array([end for _, end in scenes], dtype=np.float64)
+    ids = np.searchsorted(starts, timestamps, side="right") - 1
+    inside = (ids >= 0) & (timestamps < ends[np.maximum(ids, 0)])
+    return np.where(inside, ids, -1).tolist()
+
+def jpeg_frames(jpeg_folder):
+    # Returns [(frame number, path)] for the frame_N.jpg files written by extract_frames.py.
+    frames = []
+    for name in os.listdir(jpeg_folder):
+        match = re.fullmatch(r"frame_(\d+)\.jpg", name)
+        if match:
+            frames.append((int(match.group(1)), os.path.join(jpeg_folder, name)))
+    return sorted(frames)
+
+def convert_jpeg_folder(dataset_dir, jpeg_folder, interval=None, video=None, label="",
+                        frame_size=DEFAULT_FRAME_SIZE, shard_size=DEFAULT_SHARD_SIZE):
+    import cv2
+    # interval is the extraction interval in seconds, used to recover timestamps (None if
+    # unknown); video defaults to the folder name.
+    video = video or os.path.basename(os.path.normpath(jpeg_folder))
+
+    def records():
+        for number, path in jpeg_frames(jpeg_folder):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Skipping unreadable {path}")
+                continue
+            timestamp = number * interval if interval is not None else None
+            yield frame, video, timestamp, -1, label
+
+    added = append_frames(dataset_dir, records(), frame_size, shard_size)
+    print(f"Added {added} frames from {jpeg_folder} to {dataset_dir}")
+    return added
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert extracted JPEG frame folders into a memory-mapped frame dataset.")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("jpeg_folders", nargs="+")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Interval in seconds the frames were extracted at, to recover timestamps")
+    parser.add_argument("--label", default="", help="Label stored for every converted frame")
+    parser.add_argument("--size", type=parse_size, default=DEFAULT_FRAME_SIZE,
+                        help="Frame size as WIDTHxHEIGHT for a new dataset (default: 224x224)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f"Frames per shard for a new dataset (default: {DEFAULT_SHARD_SIZE})")
+    args = parser.parse_args(argv)
+    for jpeg_folder in args.jpeg_folders:
+        convert_jpeg_folder(args.dataset_dir, jpeg_folder, args.interval, label=args.label,
+                            frame_size=args.size, shard_size=args.shard_size)
+
+if __name__ == "__main__":
+    main()
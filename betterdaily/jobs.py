@@ -0,0 +1,166 @@
+import collections
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .ffmpeg_utils import PROGRESS_ENV
+
+"""
+jobs.py
+Background job queue for the GUI. Each job is a command run in its own Python process by a
+small pool of worker threads, so several jobs run at once and the caller never blocks. Commands
+go through `python -m betterdaily`, which hands them to the daemon when one is running. The
+output of every job is read as it is written: tqdm and ffmpeg redraw their progress line with
+carriage returns, so output is split on both \r and \n and the latest line is kept as the job's
+progress, along with any rate it reports (it/s, fps, speed=1.2x). Jobs are plain dicts; read
+them under their "lock".
+"""
+
+# Jobs run at once.
+DEFAULT_WORKERS = 2
+# Output lines kept per job.
+OUTPUT_LINES = 500
+# Seconds a cancelled job gets to exit before it is killed.
+CANCEL_TIMEOUT = 5
+RATE = re.compile(r"(\d+(?:\.\d+)?\s*(?:it|s|frames?|[kMG]?B)/s|speed=\s*\d+(?:\.\d+)?x|fps=\s*\d+(?:\.\d+)?)")
+
+def start_manager(workers=DEFAULT_WORKERS):
+    return {"pool": ThreadPoolExecutor(max_workers=workers), "jobs": [], "lock": threading.Lock()}
+
+def command_line(command, args):
+    # Runs a BetterDaily command with the interpreter the caller runs on.
+    return [sys.executable, "-m", "betterdaily", command] + list(args)
+
+def submit(manager, name, command):
+    job = {"name": name, "command": command, "status": "queued",
+           "submitted": time.time(), "started": None, "finished": None, "returncode": None,
+           "progress": "", "rate": "", "output": collections.deque(maxlen=OUTPUT_LINES),
+           "process": None, "lock": threading.Lock()}
+    with manager["lock"]:
+        job["id"] = len(manager["jobs"]) + 1
+        manager["jobs"].append(job)
+    manager["pool"].submit(run_job, job)
+    return job
+
+def add_output(job, text, final):
+    # A line ended by \n is kept in the output; one ended by \r only updates the progress.
+    text = text.strip()
+    if not text:
+        return
+    with job["lock"]:
+        job["progress"] = text
+        rate = RATE.findall(text)
+        if rate:
+            job["rate"] = rate[-1]
+        if final:
+            job["output"].append(text)
+
+def run_job(job):
+    with job["lock"]:
+        if job["status"] == "cancelled":
+            return
+        job["status"] = "running"
+        job["started"] = time.time()
+        # Unbuffered output, so progress shows up as soon as it is printed, ffmpeg progress
+        # reports turned on, and the package importable wherever the caller was started from.
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        python_path = os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+        env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONPATH=python_path, **{PROGRESS_ENV: "1"})
+        try:
+            # A session of its own puts the job and every process it starts in one process group.
+            job["process"] = subprocess.Popen(job["command"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                              stdin=subprocess.DEVNULL, env=env, start_new_session=True)
+        except OSError as e:
+            job["status"] = "failed"
+            job["finished"] = time.time()
+            job["output"].append(str(e))
+            return
+
+    pending = b""
+    while True:
+        chunk = job["process"].stdout.read1(4096)
+        if not chunk:
+            break
+        pending += chunk
+        parts = re.split(rb"(\r\n|\r|\n)", pending)
+        # parts alternates text and separators; the last text has no separator yet.
+        for text, separator in zip(parts[0:-1:2], parts[1::2]):
+            add_output(job, text.decode(errors="replace"), separator != b"\r")
+        pending = parts[-1]
+    add_output(job, pending.decode(errors="replace"), True)
+
+    returncode = job["process"].wait()
+    with job["lock"]:
+        job["returncode"] = returncode
+        job["finished"] = time.time()
+        if job["status"] != "cancelled":
+            job["status"] = "done" if returncode == 0 else "failed"
+
+def cancel(job):
+    # Queued jobs never start; running ones are terminated, then killed if they do not exit.
+    with job["lock"]:
+        if job["status"] not in ("queued", "running"):
+            return
+        was_running = job["status"] == "running"
+        job["status"] = "cancelled"
+        process = job["process"]
+        if not was_running:
+            job["finished"] = time.time()
+    if was_running and process is not None:
+        signal_job(process)
+        threading.Thread(target=kill_after, args=(process, CANCEL_TIMEOUT), daemon=True).start()
+
+def signal_job(process, kill=False):
+    # Signals the job's whole process group, so the ffmpeg processes and pool workers it started
+    # stop with it instead of being orphaned. Without process groups only the job itself is.
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    elif kill:
+        process.kill()
+    else:
+        process.terminate()
+
+def kill_after(process, timeout):
+    # Whatever is left of the group once the job exits or the timeout passes is killed.
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        pass
+    signal_job(process, kill=True)
+
+def elapsed(job):
+    with job["lock"]:
+        if job["started"] is None:
+            return 0.0
+        return (job["finished"] or time.time()) - job["started"]
+
+def snapshot(manager):
+    # Copies of every job's display fields, safe to read from another thread.
+    with manager["lock"]:
+        jobs = list(manager["jobs"])
+    rows = []
+    for job in jobs:
+        seconds = elapsed(job)
+        with job["lock"]:
+            rows.append({"id": job["id"], "name": job["name"], "status": job["status"], "elapsed": seconds,
+                         "progress": job["progress"], "rate": job["rate"], "output": list(job["output"])})
+    return rows
+
+def find_job(manager, job_id):
+    with manager["lock"]:
+        return next((job for job in manager["jobs"] if job["id"] == job_id), None)
+
+def stop_manager(manager):
+    # Cancels every job and waits for the workers to finish.
+    with manager["lock"]:
+        jobs = list(manager["jobs"])
+    for job in jobs:
+        cancel(job)
+    manager["pool"].shutdown(wait=True)
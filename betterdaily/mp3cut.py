@@ -0,0 +1,166 @@
+import mmap
+from array import array
+
+"""
+mp3cut.py
+Cuts MP3 files without decoding them. The frame headers are parsed into an index of frame
+offsets, and each segment is written by copying the whole frames between its start and end,
+so cuts land on the nearest frame boundary (about 26 ms for 44.1 kHz MPEG-1 Layer III).
+Each cut starts with a Xing header frame giving its frame count, size and seek table, so the
+duration of a VBR cut is read from the header rather than guessed from its first frame's bitrate.
+"""
+
+# Bitrates in kbps, indexed by [mpeg1][layer][bitrate index]; MPEG-2 and 2.5 share a table.
+BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+# Sample rates indexed by the version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1).
+SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+COPY_CHUNK_SIZE = 1024 * 1024
+# ffmpeg, and so pydub and MoviePy, cannot open an MP3 holding a single frame.
+MIN_FRAMES = 2
+# Xing header flags: frame count, byte count and a 100-entry seek table follow the tag.
+XING_FLAGS = 0x7
+
+def parse_header(data, offset):
+    # Returns (frame_length, samples_per_frame, sample_rate) for a valid frame header at offset,
+    # or None.
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[offset + 1] >> 3) & 3
+    layer = 4 - ((data[offset + 1] >> 1) & 3)
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 3
+    padding = (data[offset + 2] >> 1) & 1
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    samples = 1152 if layer == 2 or mpeg1 else 576
+    return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate
+
+def id3v2_size(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def side_info_size(data, offset):
+    mpeg1 = (data[offset + 1] >> 3) & 3 == 3
+    mono = data[offset + 3] >> 6 == 3
+    return (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+def is_info_frame(data, offset):
+    # A Xing/Info or VBRI header frame carries no audio and must not be counted.
+    side_info = side_info_size(data, offset)
+    return (data[offset + 4 + side_info:offset + 8 + side_info] in (b"Xing", b"Info")
+            or data[offset + 36:offset + 40] == b"VBRI")
+
+def build_index(path):
+    # Returns (offsets, samples_per_frame, sample_rate). offsets holds the byte offset of every
+    # audio frame plus one past the end of the last frame.
+    offsets = array("Q")
+    samples_per_frame = sample_rate = None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = id3v2_size(data)
+        end = offset
+        while offset + 4 <= len(data):
+            header = parse_header(data, offset)
+            # A sync word alone is weak evidence; the next frame (or a trailing ID3v1 tag, or
+            # the end of the file) must follow where this header says the frame ends.
+            next_offset = offset + header[0] if header else None
+            if header is None or next_offset > len(data) or not (
+                    next_offset == len(data) or parse_header(data, next_offset)
+                    or data[next_offset:next_offset + 3] == b"TAG"):
+                if offsets and data[offset:offset + 3] == b"TAG":
+                    break
+                offset = data.find(b"\xff", offset + 1)
+                if offset < 0:
+                    break
+                continue
+            _, samples, rate = header
+            if samples_per_frame is None:
+                samples_per_frame, sample_rate = samples, rate
+                if is_info_frame(data, offset):
+                    offset = next_offset
+                    continue
+            offsets.append(offset)
+            offset = end = next_offset
+        offsets.append(end)
+    if len(offsets) < 2:
+        raise ValueError(f"No MPEG audio frames found in {path}")
+    return offsets, samples_per_frame, sample_rate
+
+def frame_at(index, ms):
+    offsets, samples_per_frame, sample_rate = index
+    frame = round(ms / 1000 * sample_rate / samples_per_frame)
+    return min(max(frame, 0), len(offsets) - 1)
+
+def xing_frame(header, frame_offsets):
+    # A Layer III frame holding no audio, only a Xing header for the frames at frame_offsets (the
+    # byte offset of each frame relative to the first, plus one past the end of the last). It
+    # copies the first frame's header, without CRC or padding, at the lowest bitrate that fits
+    # the tag. Returns None for Layer I and II, which have no such header.
+    header = bytearray(header)
+    if (header[1] >> 1) & 3 != 1:
+        return None
+    header[1] |= 0x01
+    header[2] &= ~0x02 & 0xFF
+    tag_offset = 4 + side_info_size(header, 0)
+    needed = tag_offset + 4 + 4 + 4 + 4 + 100
+    for bitrate_index in range(1, 15):
+        header[2] = (header[2] & 0x0F) | bitrate_index << 4
+        length = parse_header(header, 0)[0]
+        if length >= needed:
+            break
+    else:
+        return None
+
+    frames = len(frame_offsets) - 1
+    total_bytes = length + frame_offsets[-1]
+    # Entry i of the seek table is the byte position, in 256ths of the file, at i% of the audio.
+    toc = bytes(min(255, (length + frame_offsets[i * frames // 100]) * 256 // total_bytes) for i in range(100))
+    frame = bytearray(length)
+    frame[:4] = header
+    frame[tag_offset:needed] = (b"Xing" + XING_FLAGS.to_bytes(4, "big") + frames.to_bytes(4, "big")
+                                + total_bytes.to_bytes(4, "big") + toc)
+    return bytes(frame)
+
+def cut(path, index, start_ms, end_ms, output_path):
+    # Copies the frames closest to [start_ms, end_ms) into output_path and returns the exact
+    # (start_ms, end_ms) the output covers. Shorter segments are extended to MIN_FRAMES frames;
+    # ValueError is raised when the audio ends before that.
+    offsets, samples_per_frame, sample_rate = index
+    first, last = frame_at(index, start_ms), frame_at(index, end_ms)
+    last = min(max(last, first + MIN_FRAMES), len(offsets) - 1)
+    if last - first < MIN_FRAMES:
+        raise ValueError(f"Segment {start_ms}-{end_ms} ms starts too close to the end of {path} to cut")
+    with open(path, "rb") as src, open(output_path, "wb") as dst:
+        src.seek(offsets[first])
+        info = xing_frame(src.read(4), [offset - offsets[first] for offset in offsets[first:last + 1]])
+        if info:
+            dst.write(info)
+        src.seek(offsets[first])
+        remaining = offsets[last] - offsets[first]
+        while remaining > 0:
+            chunk = src.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            dst.write(chunk)
+            remaining -= len(chunk)
+    frame_ms = 1000 * samples_per_frame / sample_rate
+    return first * frame_ms, last * frame_ms
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+from .ffmpeg_utils import ffmpeg_binary, run_ffmpeg
+
+"""
+overlays.py
+Renders each distinct text overlay once into a cached PNG and composites it onto a video with
+an ffmpeg overlay filter, so frames are never blended in Python.
+"""
+
+OVERLAY_CACHE_DIR = os.path.expanduser("~/.cache/betterdaily/overlays")
+
+def overlay_png(text, size, fontsize=70, color='white', bg_color='black', cache_dir=OVERLAY_CACHE_DIR):
+    params = [text, list(size), fontsize, color, bg_color]
+    key = hashlib.sha1(json.dumps(params).encode()).hexdigest()
+    path = os.path.join(cache_dir, f"{key}.png")
+    if not os.path.exists(path):
+        # moviepy.editor is slow to import and only needed the first time an overlay is drawn.
+        from moviepy.editor import TextClip
+        os.makedirs(cache_dir, exist_ok=True)
+        txt_clip = TextClip(text, fontsize=fontsize, color=color, bg_color=bg_color, size=tuple(size))
+        # Concurrent renders may create the same overlay; write privately, then rename.
+        tmp_path = os.path.join(cache_dir, f"{key}.{os.getpid()}.png")
+        txt_clip.save_frame(tmp_path, withmask=True)
+        txt_clip.close()
+        os.replace(tmp_path, path)
+    return path
+
+def render_with_overlay(visual_files, audio_file, overlay_file, output_file, duration, fps=24, threads=None,
+                        size=None):
+    # visual_files is one path or a list of clips played back to back; chained clips are
+    # scaled to size (the first clip's (width, height)) and joined with the concat filter. The overlay image is a
+    # single frame; the overlay filter keeps repeating it until the video ends, centred like
+    # TextClip.set_pos('center'). Without an overlay file the visuals are only re-timed (and
+    # scaled, when chained).
+    if isinstance(visual_files, str):
+        visual_files = [visual_files]
+    count = len(visual_files)
+    cmd = [ffmpeg_binary(), "-y", "-loglevel", "error"]
+    for visual_file in visual_files:
+        cmd += ["-i", visual_file]
+    cmd += ["-i", audio_file]
+    if overlay_file:
+        cmd += ["-i", overlay_file]
+    overlay = f"[{count + 1}:v]overlay=(W-w)/2:(H-h)/2," if overlay_file else ""
+    if count == 1:
+        graph = f"[0:v]{overlay}fps={fps}[v]"
+    else:
+        width, height = size
+        graph = "".join(f"[{i}:v]scale={width}:{height},setsar=1,fps={fps},format=yuv420p[s{i}];"
+                        for i in range(count))
+        graph += "".join(f"[s{i}]" for i in range(count))
+        graph += f"concat=n={count}:v=1:a=0[cat];[cat]{overlay}fps={fps}[v]"
+    cmd += ["-filter_complex", graph,
+            "-map", "[v]", "-map", f"{count}:a:0", "-t", f"{duration:.3f}",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "libmp3lame"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd += ["-f", "mp4", output_file]
+    returncode, stderr = run_ffmpeg(cmd, os.path.basename(output_file))
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to render {output_file}: {stderr.strip()}")
+    return output_file
@@ -0,0 +1,121 @@
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .analysis_reader import downscale_for_detection, read_frames, source_info
+from .ffmpeg_utils import keyframe_times
+from .scene_cache import file_fingerprint
+
+"""
+parallel_scenes.py
+Splits a video into keyframe-aligned shards, runs the content detector on each shard in a
+process pool and merges the results into the same scene list a serial detect_scenes returns.
+The same shards, scanned one after the other with each result appended to a checkpoint file,
+make a scan that resumes where it stopped after a crash.
+"""
+
+# Length of the chunks a resumable scan checkpoints after.
+CHECKPOINT_SECONDS = 60
+
+def scan_shard(video_path, threshold, start_frame, end_frame, width=None, downscale=None):
+    from scenedetect.detectors import ContentDetector
+    from scenedetect.scene_manager import compute_downscale_factor
+    # Returns the frames in [start_frame, end_frame) whose content score is above the
+    # threshold, and the number of the last frame decoded. width is the proxy width frames are
+    # decoded at (None for the source resolution).
+    # The score of a frame depends on the frame before it, so every shard but the first is
+    # seeded with the last frame of the previous shard.
+    detector = ContentDetector(threshold=threshold, min_scene_len=0)
+    above = []
+    last_frame = None
+    for frame_num, frame in read_frames(video_path, width, False, max(start_frame - 1, 0), end_frame):
+        if downscale is None:
+            downscale = compute_downscale_factor(frame.shape[1])
+        if detector.process_frame(frame_num, downscale_for_detection(frame, downscale)) and frame_num >= start_frame:
+            above.append(frame_num)
+        last_frame = frame_num
+    return above, last_frame
+
+def shard_boundaries(video_path, total_frames, fps, shards):
+    # Pick the keyframe closest to each even split point, falling back to the split point itself
+    # when the keyframes cannot be listed.
+    keyframes = [round(t * fps) for t in keyframe_times(video_path)]
+    boundaries = set()
+    for i in range(1, shards):
+        target = total_frames * i // shards
+        if keyframes:
+            target = min(keyframes, key=lambda k: abs(k - target))
+        if 0 < target < total_frames:
+            boundaries.add(target)
+    return [0] + sorted(boundaries) + [None]
+
+def merge_shards(results, fps, min_scene_len=15):
+    from scenedetect import FrameTimecode
+    from scenedetect.scene_detector import FlashFilter
+    from scenedetect.scene_manager import get_scenes_from_cuts
+    # Replay the minimum scene length filter over the whole video so cuts near shard
+    # boundaries are merged or suppressed exactly as in a serial pass.
+    above = set()
+    last_frame = None
+    for shard_above, shard_last in results:
+        above.update(shard_above)
+        if shard_last is not None:
+            last_frame = shard_last
+    if last_frame is None:
+        return []
+    flash_filter = FlashFilter(mode=FlashFilter.Mode.MERGE, length=min_scene_len)
+    cuts = []
+    for frame_num in range(last_frame + 1):
+        cuts += flash_filter.filter(frame_num=frame_num, above_threshold=frame_num in above)
+    if not cuts:
+        return []
+    return get_scenes_from_cuts(cut_list=[FrameTimecode(cut, fps) for cut in cuts],
+                                start_pos=FrameTimecode(0, fps),
+                                end_pos=FrameTimecode(last_frame + 1, fps))
+
+def detect_scenes_parallel(video_path, threshold=30.0, workers=None, width=None, downscale=None):
+    workers = workers or os.cpu_count()
+    fps, _, _, total_frames = source_info(video_path)
+
+    bounds = shard_boundaries(video_path, total_frames, fps, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scan_shard, video_path, threshold, start, end, width, downscale)
+                   for start, end in zip(bounds, bounds[1:])]
+        results = [future.result() for future in futures]
+    return merge_shards(results, fps)
+
+def detect_scenes_resumable(video_path, threshold=30.0, checkpoint_path=None, width=None, downscale=None,
+                            chunk_seconds=CHECKPOINT_SECONDS):
+    # Scans the video one chunk at a time and appends each chunk's result to checkpoint_path, so
+    # an interrupted scan continues at its first unfinished chunk. The checkpoint is only reused
+    # for the same video and parameters, and is removed once the scan is complete.
+    fps, _, _, total_frames = source_info(video_path)
+    header = {"video": file_fingerprint(video_path), "threshold": threshold, "width": width, "downscale": downscale}
+    bounds = None
+    done = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as file:
+            # A line cut short by a crash has no newline and is ignored.
+            lines = [json.loads(line) for line in file if line.endswith("\n")]
+        if lines and lines[0].get("header") == header:
+            bounds = lines[0]["bounds"]
+            done = {line["start"]: (line["above"], line["last_frame"]) for line in lines[1:]}
+    if bounds is None:
+        chunks = max(1, math.ceil(total_frames / (fps * chunk_seconds))) if fps > 0 else 1
+        bounds = shard_boundaries(video_path, total_frames, fps, chunks)
+        with open(checkpoint_path, "w") as file:
+            file.write(json.dumps({"header": header, "bounds": bounds}) + "\n")
+    elif done:
+        print(f"Resuming scene detection of {video_path}: {len(done)} of {len(bounds) - 1} chunks done")
+
+    results = []
+    with open(checkpoint_path, "a") as file:
+        for start, end in zip(bounds, bounds[1:]):
+            if start not in done:
+                done[start] = scan_shard(video_path, threshold, start, end, width, downscale)
+                file.write(json.dumps({"start": start, "above": done[start][0], "last_frame": done[start][1]}) + "\n")
+                file.flush()
+            results.append(done[start])
+    scenes = merge_shards(results, fps)
+    os.remove(checkpoint_path)
+    return scenes
@@ -0,0 +1,162 @@
+import argparse
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from . import catalog
+
+"""
+phash.py
+Perceptual hashes of video frames for near-duplicate detection. A frame's hash is the sign of
+the low-frequency 8x8 block of the DCT of its 32x32 grayscale thumbnail, packed into a uint64,
+so recaps, openings and repeated shots hash within a few bits of each other regardless of
+resolution or re-encoding. Hashes are compared with XOR and a popcount over packed NumPy
+arrays, which scans tens of thousands of hashes per query in well under a millisecond.
+"""
+
+# Hashes at most this many bits apart are treated as the same shot.
+DEFAULT_MAX_DISTANCE = 6
+# Rows compared at once in all-pairs searches; bounds the (block, n) distance matrix.
+PAIR_BLOCK_SIZE = 128
+# Clips opened at once when indexing; decoding releases the GIL.
+INDEX_WORKERS = 8
+
+if hasattr(np, "bitwise_count"):
+    def popcount(values):
+        return np.bitwise_count(values)
+else:
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(values):
+        values = np.ascontiguousarray(values, dtype=np.uint64)
+        return _BYTE_BITS[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+def phash(frame):
+    import cv2
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    thumbnail = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(thumbnail)[:8, :8].flatten()
+    # The DC term only tracks overall brightness; leave it out of the median.
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+def phashes(frames):
+    return np.array([phash(frame) for frame in frames], dtype=np.uint64)
+
+def hamming(hashes, value):
+    # Distances from value to every hash in hashes.
+    return popcount(np.asarray(hashes, dtype=np.uint64) ^ np.uint64(value))
+
+def is_duplicate(hashes, value, max_distance=DEFAULT_MAX_DISTANCE):
+    return len(hashes) > 0 and bool(hamming(hashes, value).min() <= max_distance)
+
+def near_pairs(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    # Returns (i, j) index pairs with i < j whose hashes are within max_distance bits.
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    pairs = []
+    for start in range(0, len(hashes), PAIR_BLOCK_SIZE):
+        block = hashes[start:start + PAIR_BLOCK_SIZE]
+        distances = popcount(block[:, None] ^ hashes[None, start:])
+        rows, cols = np.nonzero(distances <= max_distance)
+        keep = cols > rows
+        pairs.extend(zip((rows[keep] + start).tolist(), (cols[keep] + start).tolist()))
+    return pairs
+
+def duplicate_groups(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    # Groups indices connected by near pairs; returns the groups with more than one member.
+    parent = list(range(len(hashes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in near_pairs(hashes, max_distance):
+        parent[find(j)] = find(i)
+    groups = {}
+    for i in range(len(hashes)):
+        groups.setdefault(find(i), []).append(i)
+    return [group for group in groups.values() if len(group) > 1]
+
+def first_frame(path):
+    import cv2
+    cap = cv2.VideoCapture(path)
+    ret, frame = cap.read()
+    cap.release()
+    return frame if ret else None
+
+def open_index(path=catalog.DEFAULT_CATALOG_PATH):
+    # Clip hashes live next to the clip catalog and are refreshed the same way, by mtime and size.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS phashes ("
+                 "path TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL, hash TEXT NOT NULL)")
+    conn.commit()
+    return conn
+
+def record_clip(conn, path, value):
+    # Stores the hash of a clip just written, so it never has to be decoded to be indexed.
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    conn.execute("INSERT OR REPLACE INTO phashes (path, mtime, size, hash) VALUES (?, ?, ?, ?)",
+                 (path, stat.st_mtime, stat.st_size, f"{int(value):016x}"))
+
+def library_hashes(conn, visual_dir):
+    # Returns (paths, hashes) for the clips in visual_dir, hashing the first frame of any clip
+    # that is new or changed since it was last indexed.
+    visual_dir = os.path.abspath(visual_dir)
+    if not os.path.isdir(visual_dir):
+        return [], np.zeros(0, dtype=np.uint64)
+    known = {row[0]: row[1:] for row in conn.execute("SELECT path, mtime, size, hash FROM phashes WHERE path LIKE ?",
+                                                     (os.path.join(visual_dir, "%"),))}
+    paths, values, stale = [], [], []
+    for name in sorted(os.listdir(visual_dir)):
+        if not name.endswith(catalog.VISUAL_EXTENSIONS):
+            continue
+        path = os.path.join(visual_dir, name)
+        stat = os.stat(path)
+        row = known.get(path)
+        paths.append(path)
+        if row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size:
+            values.append(int(row[2], 16))
+        else:
+            values.append(None)
+            stale.append(len(paths) - 1)
+
+    with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as executor:
+        frames = executor.map(first_frame, [paths[i] for i in stale])
+        for i, frame in zip(stale, frames):
+            if frame is not None:
+                values[i] = phash(frame)
+                record_clip(conn, paths[i], values[i])
+    conn.commit()
+    indexed = [i for i, value in enumerate(values) if value is not None]
+    return [paths[i] for i in indexed], np.array([values[i] for i in indexed], dtype=np.uint64)
+
+def dedup_report(visual_dir, max_distance=DEFAULT_MAX_DISTANCE, index_path=catalog.DEFAULT_CATALOG_PATH):
+    conn = open_index(index_path)
+    paths, hashes = library_hashes(conn, visual_dir)
+    conn.close()
+    groups = duplicate_groups(hashes, max_distance)
+    wasted = 0
+    for group in groups:
+        # Keep the first clip of each group; the rest are the duplicates.
+        print(", ".join(os.path.basename(paths[i]) for i in group))
+        wasted += sum(os.path.getsize(paths[i]) for i in group[1:])
+    duplicates = sum(len(group) - 1 for group in groups)
+    print(f"{len(paths)} clips, {len(groups)} groups of near-duplicates, {duplicates} redundant clips "
+          f"({wasted / 1024 / 1024:.1f} MB)")
+    return groups
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report near-duplicate clips in a visual clip library.")
+    parser.add_argument("visual_dir")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="Largest hash distance in bits treated as a duplicate (default: %(default)s)")
+    parser.add_argument("--index", default=catalog.DEFAULT_CATALOG_PATH, help="Hash index file (default: %(default)s)")
+    args = parser.parse_args(argv)
+    dedup_report(args.visual_dir, args.max_distance, args.index)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from . import audioseg
+from . import catalog
+from . import mp3cut
+from . import scene_cache
+from .clip_extract import EXTRACT_MODES
+from .combine_audio_visual import OVERLAY_TEXT, plan_posts, render_post
+
+"""
+pipeline.py
+Runs the whole workflow (transcribe -> audioseg, vidtoclips, then combine) as a DAG of stages.
+Every unit of work (one transcript, one audio clip, one episode's clips, one post) is a task
+recorded in <work_dir>/manifest.json with a signature over its input fingerprints and
+parameters; a task only runs again when its signature changes or one of its outputs is missing.
+Editing one line of a segments file therefore re-cuts one clip and re-renders one post. Stages
+whose dependencies are done run concurrently, so the audio and visual branches overlap.
+"""
+
+MANIFEST_FILE = "manifest.json"
+# Bump when a stage's output for the same inputs and parameters changes.
+PIPELINE_VERSION = 1
+
+def load_manifest(work_dir):
+    path = os.path.join(work_dir, MANIFEST_FILE)
+    tasks = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            tasks = json.load(file).get("tasks", {})
+    return {"path": path, "tasks": tasks, "lock": threading.Lock()}
+
+def save_manifest(manifest):
+    tmp_path = manifest["path"] + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump({"version": PIPELINE_VERSION, "tasks": manifest["tasks"]}, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest["path"])
+
+def task_signature(inputs, params):
+    fingerprints = {path: scene_cache.file_fingerprint(path) for path in inputs}
+    blob = json.dumps({"version": PIPELINE_VERSION, "inputs": fingerprints, "params": params}, sort_keys=True)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+def run_task(manifest, task_id, inputs, params, action):
+    # action() does the work and returns the list of output paths. Returns the outputs, either
+    # freshly produced or recorded by an earlier run with the same signature.
+    signature = task_signature(inputs, params)
+    with manifest["lock"]:
+        entry = manifest["tasks"].get(task_id)
+    if entry and entry["signature"] == signature and all(os.path.exists(p) for p in entry["outputs"]):
+        return entry["outputs"]
+
+    print(f"Running {task_id}")
+    outputs = action()
+    with manifest["lock"]:
+        manifest["tasks"][task_id] = {"signature": signature, "inputs": sorted(inputs),
+                                      "params": params, "outputs": outputs}
+        save_manifest(manifest)
+    return outputs
+
+def run_items(context, calls):
+    # Runs (function, args) calls on the shared item pool and returns their results in order.
+    futures = [context["items"].submit(function, *args) for function, args in calls]
+    return [future.result() for future in futures]
+
+def stage_transcribe(context, results):
+    # Returns {source audio: transcript .jsonl, or None when transcription is skipped}.
+    config = context["config"]
+    transcript_dir = os.path.join(config["work_dir"], "transcripts")
+    if not config["transcribe"]:
+        return {audio: None for audio, _ in config["audio"]}
+    # The analysis stages import their heavy dependencies only when they actually run.
+    from .transcribe import transcribe_audio
+
+    def transcribe(audio):
+        name = os.path.splitext(os.path.basename(audio))[0]
+        outputs = [os.path.join(transcript_dir, name + ".txt"), os.path.join(transcript_dir, name + ".jsonl")]
+
+        def action():
+            transcribe_audio(audio, transcript_dir, config["engine"], config["recognizer_workers"])
+            return outputs
+
+        run_task(context["manifest"], f"transcribe:{audio}", [audio], {"engine": config["engine"]}, action)
+        return outputs[1]
+
+    transcripts = run_items(context, [(transcribe, (audio,)) for audio, _ in config["audio"]])
+    return {audio: transcript for (audio, _), transcript in zip(config["audio"], transcripts)}
+
+def stage_audioseg(context, results):
+    # One task per segments-file line, so editing a line only re-cuts that clip.
+    config = context["config"]
+    clip_dir = os.path.join(config["work_dir"], "audio_clips")
+    os.makedirs(clip_dir, exist_ok=True)
+    calls = []
+    for audio, segments_file in config["audio"]:
+        transcript = results["transcribe"][audio]
+        tokens = audioseg.load_transcript(transcript) if transcript else None
+        mode = config["audio_mode"]
+        if mode == "frames" and not audio.lower().endswith(".mp3"):
+            mode = "accurate"
+        index_lock = threading.Lock()
+        index = []
+
+        def cut(audio, mode, index, index_lock, i, start, end):
+            clip_filename = audioseg.clip_path(clip_dir, audio, i)
+
+            def action():
+                frame_index = None
+                if mode == "frames":
+                    # Index the source once, and only if some clip actually has to be cut.
+                    with index_lock:
+                        if not index:
+                            index.append(mp3cut.build_index(audio))
+                    frame_index = index[0]
+                audioseg.cut_clip(audio, frame_index, start, end, clip_filename)
+                return [clip_filename]
+
+            params = {"start_ms": start, "end_ms": end, "mode": mode}
+            return run_task(context["manifest"], f"audioseg:{clip_filename}", [audio], params, action)[0]
+
+        with open(segments_file) as file:
+            for i, line in enumerate(file):
+                if line.strip():
+                    start, end = audioseg.resolve_segment(line, tokens)
+                    calls.append((cut, (audio, mode, index, index_lock, i, start, end)))
+    return run_items(context, calls)
+
+def stage_vidtoclips(context, results):
+    # One task per episode; each episode's clips go to their own folder.
+    config = context["config"]
+    from . import vidtoclips
+
+    def extract(video):
+        name = os.path.splitext(os.path.basename(video))[0]
+        output_folder = os.path.join(config["work_dir"], "clips", name)
+
+        def action():
+            os.makedirs(output_folder, exist_ok=True)
+            timings = vidtoclips.process_video(video, output_folder, config["scene_workers"], config["threshold"],
+                                               cache_path=scene_cache.DEFAULT_CACHE_PATH,
+                                               extract_mode=config["extract_mode"])
+            return sorted(timings)
+
+        params = {"threshold": config["threshold"], "extract_mode": config["extract_mode"],
+                  "classifier": vidtoclips.CLASSIFIER_VERSION}
+        return run_task(context["manifest"], f"vidtoclips:{video}", [video], params, action)
+
+    clips = run_items(context, [(extract, (video,)) for video in config["videos"]])
+    visual_files = [clip for episode in clips for clip in episode]
+    for visual_dir in config["visual_dirs"]:
+        visual_files += [os.path.join(visual_dir, f) for f in os.listdir(visual_dir)
+                         if f.endswith('.mp4') or f.endswith('.mov')]
+    return sorted(visual_files)
+
+def stage_combine(context, results):
+    # One task per post over the audio clip and the visuals chosen for it from the catalog.
+    config = context["config"]
+    conn = catalog.open_catalog()
+    clips = catalog.refresh(conn, results["vidtoclips"])
+    conn.close()
+    audio_files = sorted(results["audioseg"])
+    if not audio_files or not clips:
+        print("Nothing to combine: no audio clips or no visual clips.")
+        return []
+    output_dir = os.path.join(config["work_dir"], "posts")
+    os.makedirs(output_dir, exist_ok=True)
+    threads = max(1, (os.cpu_count() or 1) // config["jobs"])
+
+    def combine(audio_file, visual_files, output_file):
+        def action():
+            render_post(audio_file, visual_files, output_file, threads, config["overlay"])
+            return [output_file]
+
+        params = {"overlay": OVERLAY_TEXT if config["overlay"] else None, "visuals": visual_files}
+        inputs = [audio_file] + visual_files
+        return run_task(context["manifest"], f"combine:{output_file}", inputs, params, action)[0]
+
+    posts = plan_posts(audio_files, clips, output_dir, config["category"])
+    return run_items(context, [(combine, post) for post in posts])
+
+# Stage name -> (stages it depends on, stage function).
+STAGES = {
+    "transcribe": ((), stage_transcribe),
+    "audioseg": (("transcribe",), stage_audioseg),
+    "vidtoclips": ((), stage_vidtoclips),
+    "combine": (("audioseg", "vidtoclips"), stage_combine),
+}
+
+def run_stages(stages, context):
+    # Starts every stage as soon as the stages it depends on have finished.
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+        running = {}
+        while len(results) < len(stages):
+            for name, (deps, function) in stages.items():
+                if name not in results and name not in running.values() and all(d in results for d in deps):
+                    running[executor.submit(function, context, results)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+def run_pipeline(config):
+    os.makedirs(config["work_dir"], exist_ok=True)
+    manifest = load_manifest(config["work_dir"])
+    with ThreadPoolExecutor(max_workers=config["jobs"]) as items:
+        results = run_stages(STAGES, {"config": config, "manifest": manifest, "items": items})
+    print(f"{len(results['combine'])} posts are up to date in {os.path.join(config['work_dir'], 'posts')}")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the whole workflow, redoing only work whose inputs changed.")
+    parser.add_argument("work_dir", help="Directory for transcripts, clips, posts and the manifest")
+    parser.add_argument("--audio", nargs=2, action="append", default=[], metavar=("AUDIO", "SEGMENTS"),
+                        help="Source audio file and its segments file (repeatable)")
+    parser.add_argument("--video", action="append", default=[], help="Episode to extract clips from (repeatable)")
+    parser.add_argument("--visuals", action="append", default=[],
+                        help="Directory of existing visual clips to use as well (repeatable)")
+    parser.add_argument("--no-transcribe", action="store_true",
+                        help="Skip transcription; segments must then be times, not phrases")
+    parser.add_argument("--engine", default="google", help="Speech recognition engine (default: google)")
+    parser.add_argument("--recognizer-workers", type=int, default=4)
+    parser.add_argument("--audio-mode", choices=audioseg.CUT_MODES, default="frames")
+    parser.add_argument("--threshold", type=float, default=30.0)
+    parser.add_argument("--scene-workers", type=int, default=1)
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default="copy")
+    parser.add_argument("--category", default=None, help="Prefer visuals of this category")
+    parser.add_argument("--no-overlay", action="store_true",
+                        help="Leave out the text overlay; H.264 visuals are then muxed without re-encoding")
+    parser.add_argument("--jobs", type=int, default=2, help="Tasks run at once across all stages (default: 2)")
+    args = parser.parse_args(argv)
+    run_pipeline({
+        "work_dir": args.work_dir, "audio": args.audio, "videos": args.video, "visual_dirs": args.visuals,
+        "transcribe": not args.no_transcribe, "engine": args.engine, "recognizer_workers": args.recognizer_workers,
+        "audio_mode": args.audio_mode, "threshold": args.threshold, "scene_workers": args.scene_workers,
+        "extract_mode": args.extract_mode, "category": args.category, "jobs": args.jobs,
+        "overlay": not args.no_overlay,
+    })
+
+if __name__ == "__main__":
+    main()
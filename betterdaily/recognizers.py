@@ -0,0 +1,90 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pydub import AudioSegment
+
+"""
+recognizers.py
+Speech recognition backends that take in-memory PCM and return {"text": ..., "words": ...}, where
+words is a list of {"word", "start", "end"} (seconds into the chunk) for engines that report word
+timings and None otherwise, and a runner that fans chunks out over a
+thread pool (network engines) or a process pool (local CPU-bound engines) and returns the
+results in chunk order.
+"""
+
+# Used when $VOSK_MODEL_PATH is not set; the variable is read when the model is loaded, so a job
+# run on the daemon sees the caller's value.
+DEFAULT_VOSK_MODEL_PATH = os.path.expanduser("~/.cache/betterdaily/vosk-model")
+
+# Loaded once per worker process.
+_vosk_model = None
+
+def mono_pcm(pcm, sample_rate, sample_width, channels, to_16bit=False):
+    if channels == 1 and not (to_16bit and sample_width != 2):
+        return pcm
+    segment = AudioSegment(data=pcm, sample_width=sample_width, frame_rate=sample_rate, channels=channels)
+    segment = segment.set_channels(1)
+    if to_16bit:
+        segment = segment.set_sample_width(2)
+    return segment.raw_data
+
+def recognize_google(pcm, sample_rate, sample_width, channels):
+    import speech_recognition as sr
+    audio_data = sr.AudioData(mono_pcm(pcm, sample_rate, sample_width, channels), sample_rate, sample_width)
+    return {"text": sr.Recognizer().recognize_google(audio_data), "words": None}
+
+def recognize_sphinx(pcm, sample_rate, sample_width, channels):
+    import speech_recognition as sr
+    audio_data = sr.AudioData(mono_pcm(pcm, sample_rate, sample_width, channels), sample_rate, sample_width)
+    return {"text": sr.Recognizer().recognize_sphinx(audio_data), "words": None}
+
+def recognize_vosk(pcm, sample_rate, sample_width, channels):
+    global _vosk_model
+    import speech_recognition as sr
+    from vosk import KaldiRecognizer, Model
+    if _vosk_model is None:
+        _vosk_model = Model(os.environ.get("VOSK_MODEL_PATH", DEFAULT_VOSK_MODEL_PATH))
+    recognizer = KaldiRecognizer(_vosk_model, sample_rate)
+    recognizer.SetWords(True)
+    recognizer.AcceptWaveform(mono_pcm(pcm, sample_rate, sample_width, channels, to_16bit=True))
+    result = json.loads(recognizer.FinalResult())
+    if not result.get("text"):
+        raise sr.UnknownValueError()
+    words = [{"word": w["word"], "start": w["start"], "end": w["end"]} for w in result.get("result", [])]
+    return {"text": result["text"], "words": words}
+
+# Engine name -> (recognize function, executor class). Network engines spend their time
+# waiting on requests, local engines on the CPU.
+ENGINES = {
+    "google": (recognize_google, ThreadPoolExecutor),
+    "sphinx": (recognize_sphinx, ProcessPoolExecutor),
+    "vosk": (recognize_vosk, ProcessPoolExecutor),
+}
+
+def recognize_chunk(engine, pcm, sample_rate, sample_width, channels):
+    # Returns (result, error message); exactly one of them is None. speech_recognition is only
+    # imported by the processes that actually recognize audio.
+    import speech_recognition as sr
+    recognize = ENGINES[engine][0]
+    try:
+        return recognize(pcm, sample_rate, sample_width, channels), None
+    except sr.UnknownValueError:
+        return None, f"{engine} could not understand the audio."
+    except sr.RequestError as e:
+        return None, f"Could not request results from {engine}; {e}"
+
+def recognize_chunks(chunks, engine="google", workers=4):
+    # chunks yields AudioSegments; results are yielded in the same order as (result, error).
+    # At most 2 * workers chunks are in flight, so memory does not grow with the episode.
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown speech recognition engine {engine!r}, expected one of {sorted(ENGINES)}")
+    executor_class = ENGINES[engine][1]
+    with executor_class(max_workers=workers) as executor:
+        in_flight = []
+        for chunk in chunks:
+            in_flight.append(executor.submit(recognize_chunk, engine, chunk.raw_data,
+                                             chunk.frame_rate, chunk.sample_width, chunk.channels))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.pop(0).result()
+        for future in in_flight:
+            yield future.result()
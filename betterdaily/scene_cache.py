@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+"""
+scene_cache.py
+Persistent SQLite cache for per-video analysis results (scene boundaries, key-frame features).
+Entries are keyed by a partial content hash of the video plus the parameters that produced
+them, and the least recently used entries are evicted once the cache exceeds its size budget.
+"""
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/betterdaily/analysis.sqlite")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SAMPLE_SIZE = 1024 * 1024
+
+def file_fingerprint(path, sample_size=SAMPLE_SIZE):
+    # Hashes the size plus the first, middle and last sample_size bytes, which is enough to tell
+    # episodes apart without reading gigabytes of video.
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        for offset in (0, max(size // 2 - sample_size // 2, 0), max(size - sample_size, 0)):
+            f.seek(offset)
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+def cache_key(kind, video_path, *params):
+    return ":".join([kind, file_fingerprint(video_path)] + [str(p) for p in params])
+
+def open_cache(path=DEFAULT_CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                 "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+    conn.commit()
+    return conn
+
+def load(conn, key):
+    row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+    conn.commit()
+    return json.loads(row[0])
+
+def store(conn, key, value, max_bytes=DEFAULT_MAX_BYTES):
+    blob = json.dumps(value).encode()
+    conn.execute("INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                 (key, blob, len(blob), time.time()))
+    evict(conn, max_bytes)
+    conn.commit()
+
+def evict(conn, max_bytes=DEFAULT_MAX_BYTES):
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+        if total <= max_bytes:
+            break
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        total -= size
+
+def scenes_to_json(scenes):
+    fps = scenes[0][0].get_framerate() if scenes else None
+    return {"fps": fps, "scenes": [[start.get_frames(), end.get_frames()] for start, end in scenes]}
+
+def scenes_from_json(value):
+    # Imported here so modules that only fingerprint files or read the cache do not load
+    # PySceneDetect and OpenCV.
+    from scenedetect import FrameTimecode
+    fps = value["fps"]
+    return [(FrameTimecode(start, fps), FrameTimecode(end, fps)) for start, end in value["scenes"]]
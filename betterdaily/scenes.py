@@ -0,0 +1,35 @@
+from . import analysis_reader
+from .parallel_scenes import detect_scenes_parallel, detect_scenes_resumable
+
+"""
+scenes.py
+Scene detection shared by vidtoclips and visuals: picks the serial, proxy, parallel or
+resumable scan for the options given and returns PySceneDetect's (start, end) timecode list.
+"""
+
+def detect_scenes(video_path, threshold=30.0, workers=1, proxy_width=None, keyframes_only=False, downscale=None,
+                  checkpoint=None):
+    from scenedetect import VideoManager, SceneManager
+    from scenedetect.detectors import ContentDetector
+    # downscale overrides PySceneDetect's automatic detector downscale factor; proxy_width decodes
+    # at that width through ffmpeg and keyframes_only decodes key frames only. Timecodes always
+    # refer to frames of the source video. With a checkpoint file the scan is serial and resumes
+    # where an interrupted one stopped (key-frame scans are quick enough to simply rerun).
+    if checkpoint and not keyframes_only:
+        return detect_scenes_resumable(video_path, threshold, checkpoint, proxy_width, downscale)
+    if keyframes_only or (proxy_width and workers <= 1):
+        return analysis_reader.detect_scenes_proxy(video_path, threshold, proxy_width, keyframes_only, downscale)
+    if workers > 1:
+        return detect_scenes_parallel(video_path, threshold, workers, proxy_width, downscale)
+    video_manager = VideoManager([video_path])
+    scene_manager = SceneManager()
+    scene_manager.add_detector(ContentDetector(threshold=threshold))
+    if downscale:
+        scene_manager.auto_downscale = False
+        scene_manager.downscale = downscale
+
+    video_manager.start()
+    scene_manager.detect_scenes(frame_source=video_manager)
+    scene_list = scene_manager.get_scene_list(video_manager.get_base_timecode())
+    video_manager.release()
+    return scene_list
@@ -0,0 +1,217 @@
+import json
+import math
+import os
+import subprocess
+import sys
+import wave
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import db_to_float, ratio_to_db
+from tqdm import tqdm
+from .recognizers import ENGINES, recognize_chunks
+
+# Milliseconds of PCM read per block by the silence splitter.
+BLOCK_MS = 10000
+# Silence added before and after each chunk sent to the recognizer.
+CHUNK_PADDING_MS = 10
+
+def convert_to_wav(audio_file_path, wav_file_path):
+    # Let ffmpeg stream the conversion instead of decoding the whole file into memory.
+    subprocess.run([AudioSegment.converter, "-y", "-loglevel", "error", "-i", audio_file_path,
+                    "-vn", "-acodec", "pcm_s16le", "-f", "wav", wav_file_path], check=True)
+
+def read_block_energy(wav, ms_start, ms_end, ms_frames):
+    # Sum of squared samples (all channels) of every millisecond in [ms_start, ms_end), using
+    # the same frame boundaries as pydub's millisecond slicing.
+    bounds = np.floor(np.arange(ms_start, ms_end + 1) * ms_frames).astype(np.int64)
+    data = wav.readframes(int(bounds[-1] - bounds[0]))
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.int64)
+    frame_energy = (samples * samples).reshape(-1, wav.getnchannels()).sum(axis=1)
+    # Frames past the end of the file count as silence, as pydub pads them with zeros.
+    cumulative = np.zeros(int(bounds[-1] - bounds[0]) + 1, dtype=np.int64)
+    np.cumsum(frame_energy, out=cumulative[1:len(frame_energy) + 1])
+    cumulative[len(frame_energy) + 1:] = cumulative[len(frame_energy)]
+    return np.diff(cumulative[bounds - bounds[0]])
+
+def silence_threshold(wav_file_path, silence_offset):
+    # pydub's audio.dBFS - silence_offset, as an amplitude, computed one block at a time.
+    with wave.open(wav_file_path, "rb") as wav:
+        max_amplitude = 2 ** (8 * wav.getsampwidth() - 1)
+        total, count = 0, 0
+        while True:
+            data = wav.readframes(wav.getframerate() * BLOCK_MS // 1000)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype=np.int16).astype(np.int64)
+            total += int(np.dot(samples, samples))
+            count += len(samples)
+    rms = int(math.sqrt(total / count)) if count else 0
+    if not rms:
+        return 0.0
+    return db_to_float(ratio_to_db(rms / max_amplitude) - silence_offset) * max_amplitude
+
+def silent_ranges(wav_file_path, min_silence_len=1000, silence_offset=14):
+    # Streaming equivalent of pydub.silence.detect_silence(seek_step=1) with
+    # silence_thresh=audio.dBFS - silence_offset. Yields [start, end] in ms as soon as a silent
+    # range can no longer grow. Only the last min_silence_len ms of energies are kept around.
+    thresh = silence_threshold(wav_file_path, silence_offset)
+    with wave.open(wav_file_path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{wav_file_path} must be 16-bit PCM")
+        ms_frames = wav.getframerate() / 1000.0
+        channels = wav.getnchannels()
+        seg_len = round(1000 * (wav.getnframes() / wav.getframerate()))
+        if seg_len < min_silence_len:
+            return
+
+        carry = np.zeros(0, dtype=np.int64)
+        carry_start = 0
+        prev = current_start = None
+        for ms_start in range(0, seg_len, BLOCK_MS):
+            ms_end = min(ms_start + BLOCK_MS, seg_len)
+            energy = np.concatenate([carry, read_block_energy(wav, ms_start, ms_end, ms_frames)])
+            cumulative = np.concatenate([[0], np.cumsum(energy)])
+            # Windows that start at carry_start + j and end inside what has been read so far.
+            starts = np.arange(carry_start, ms_end - min_silence_len + 1)
+            if len(starts):
+                offsets = starts - carry_start
+                window_energy = cumulative[offsets + min_silence_len] - cumulative[offsets]
+                window_frames = (np.floor((starts + min_silence_len) * ms_frames)
+                                 - np.floor(starts * ms_frames)).astype(np.int64)
+                rms = np.floor(np.sqrt(window_energy / np.maximum(window_frames * channels, 1)))
+                silent = starts[rms <= thresh]
+                if len(silent):
+                    if prev is None:
+                        prev = current_start = int(silent[0])
+                    chain = np.concatenate([[prev], silent])
+                    # A new range begins where consecutive silent windows leave a gap longer
+                    # than min_silence_len, exactly like detect_silence.
+                    for j in np.flatnonzero(np.diff(chain) > min_silence_len):
+                        yield [current_start, int(chain[j]) + min_silence_len]
+                        current_start = int(chain[j + 1])
+                    prev = int(chain[-1])
+                # Any later silent window would be far enough away to start a new range.
+                if prev is not None and starts[-1] >= prev + min_silence_len:
+                    yield [current_start, prev + min_silence_len]
+                    prev = current_start = None
+            next_start = max(carry_start, ms_end - min_silence_len + 1)
+            carry = energy[next_start - carry_start:]
+            carry_start = next_start
+        if prev is not None:
+            yield [current_start, prev + min_silence_len]
+
+def speech_ranges(wav_file_path, min_silence_len=1000, silence_offset=14, keep_silence=500):
+    # Streaming equivalent of the [start, end] ranges split_on_silence would cut, in ms.
+    with wave.open(wav_file_path, "rb") as wav:
+        seg_len = round(1000 * (wav.getnframes() / wav.getframerate()))
+    if isinstance(keep_silence, bool):
+        keep_silence = seg_len if keep_silence else 0
+
+    def nonsilent():
+        prev_end = 0
+        end = None
+        for start, end in silent_ranges(wav_file_path, min_silence_len, silence_offset):
+            if not (prev_end == 0 and start == 0):
+                yield [prev_end, start]
+            prev_end = end
+        if end is None:
+            yield [0, seg_len]
+        elif end != seg_len:
+            yield [prev_end, seg_len]
+
+    # Padded ranges that overlap are split halfway, which needs the next range to be known.
+    pending = None
+    for start, end in nonsilent():
+        current = [start - keep_silence, end + keep_silence]
+        if pending is not None:
+            if current[0] < pending[1]:
+                pending[1] = (pending[1] + current[0]) // 2
+                current[0] = pending[1]
+            yield max(pending[0], 0), min(pending[1], seg_len)
+        pending = current
+    if pending is not None:
+        yield max(pending[0], 0), min(pending[1], seg_len)
+
+def stream_speech_chunks(wav_file_path, min_silence_len=1000, silence_offset=14, keep_silence=500):
+    # Yields (start_ms, end_ms, AudioSegment) for every chunk split_on_silence would return.
+    with wave.open(wav_file_path, "rb") as wav:
+        ms_frames = wav.getframerate() / 1000.0
+        for start, end in speech_ranges(wav_file_path, min_silence_len, silence_offset, keep_silence):
+            wav.setpos(int(start * ms_frames))
+            frames = int(end * ms_frames) - int(start * ms_frames)
+            data = wav.readframes(frames)
+            # Like pydub, pad the last chunk with silence up to its rounded millisecond length.
+            frame_width = wav.getsampwidth() * wav.getnchannels()
+            data += b"\x00" * (frames * frame_width - len(data))
+            yield start, end, AudioSegment(data=data, sample_width=wav.getsampwidth(),
+                                           frame_rate=wav.getframerate(), channels=wav.getnchannels())
+
+def word_record(word, chunk_start, chunk_end):
+    # Word times are relative to the padded chunk; map them back onto the source audio.
+    def to_ms(seconds):
+        return min(max(chunk_start + round(seconds * 1000) - CHUNK_PADDING_MS, chunk_start), chunk_end)
+    return {"word": word["word"], "start_ms": to_ms(word["start"]), "end_ms": to_ms(word["end"])}
+
+def transcribe_audio(audio_file_path, output_path, engine="google", workers=4):
+    # Ensure the output directory exists
+    os.makedirs(output_path, exist_ok=True)
+    
+    audio_basename = os.path.basename(audio_file_path)
+    wav_file_path = os.path.join(output_path, os.path.splitext(audio_basename)[0] + '.wav')
+    transcription_file_path = os.path.join(output_path, os.path.splitext(audio_basename)[0] + '.txt')
+    transcript_jsonl_path = os.path.join(output_path, os.path.splitext(audio_basename)[0] + '.jsonl')
+
+    # Convert mp3 file to wav
+    convert_to_wav(audio_file_path, wav_file_path)
+
+    # Split audio where silence is detected, streaming the wav file block by block
+    chunks = stream_speech_chunks(wav_file_path, min_silence_len=1000, silence_offset=14, keep_silence=500)
+
+    ranges = []
+
+    def padded_chunks():
+        chunk_silent = AudioSegment.silent(duration=CHUNK_PADDING_MS)
+        for start, end, chunk in chunks:
+            ranges.append((start, end))
+            yield chunk_silent + chunk + chunk_silent
+
+    # Recognize the chunks concurrently; results come back in chunk order. Every chunk is also
+    # written to the structured transcript with its position in the source audio.
+    full_transcription = []
+    results = recognize_chunks(padded_chunks(), engine=engine, workers=workers)
+    with open(transcript_jsonl_path, "w") as transcript:
+        for i, (result, error) in enumerate(tqdm(results, desc=f"Processing {audio_basename}")):
+            start, end = ranges[i]
+            record = {"chunk": i + 1, "start_ms": start, "end_ms": end}
+            if error is None:
+                full_transcription.append(result["text"])
+                record["text"] = result["text"]
+                if result["words"] is not None:
+                    record["words"] = [word_record(word, start, end) for word in result["words"]]
+            else:
+                print(f"Chunk {i+1}: {error}")
+                record["text"] = ""
+                record["error"] = error
+            transcript.write(json.dumps(record) + "\n")
+
+    # Save the full transcription to a text file
+    with open(transcription_file_path, "w") as file:
+        file.write(" ".join(full_transcription))
+
+    print(f"Transcription completed for {audio_basename}. Check the {transcription_file_path} file.")
+    print(f"Timestamped transcript written to {transcript_jsonl_path}.")
+    os.remove(wav_file_path)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) > 1:
+        audio_file_path = argv[0]
+        output_path = argv[1]
+        engine = argv[2] if len(argv) > 2 else "google"
+        workers = int(argv[3]) if len(argv) > 3 else 4
+        transcribe_audio(audio_file_path, output_path, engine, workers)
+    else:
+        print(f"Usage: python transcribe.py <audio_file_path> <output_path> [{'|'.join(ENGINES)}] [workers]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import os
+from . import catalog
+from .combine_audio_visual import plan_posts, render_post
+
+"""
+video.py
+This script provides utility functions for video processing, such as loading videos,
+saving processed videos, and other helper functions related to video handling.
+"""
+
+# Default paths
+VISUALS_PATH = os.path.expanduser('~/Documents/BetterDaily/Visuals')
+AUDIO_CLIPS_PATH = os.path.expanduser('~/Documents/BetterDaily/Completed Clips')
+OUTPUT_PATH = os.path.expanduser('~/Documents/BetterDaily/Posts')
+
+def create_posts(visuals_path=VISUALS_PATH, audio_clips_path=AUDIO_CLIPS_PATH, output_path=OUTPUT_PATH):
+    # Ensure the output directory exists
+    os.makedirs(output_path, exist_ok=True)
+
+    # Get the catalogued visual clips and the audio files
+    conn = catalog.open_catalog()
+    clips = catalog.refresh_dir(conn, visuals_path)
+    conn.close()
+    audio_files = sorted([f for f in os.listdir(audio_clips_path) if f.endswith('.mp3')])
+
+    # Combine each audio clip with visuals long enough to cover it
+    posts = plan_posts([os.path.join(audio_clips_path, f) for f in audio_files], clips, output_path)
+    for audio_file, visual_files, output_file in posts:
+        # Cut the visuals to the audio length, add the cached text overlay and write the video file
+        render_post(audio_file, visual_files, output_file)
+
+        print(f"Created {output_file}")
+
+    print("All posts have been created.")
+    return [post[2] for post in posts]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create a post for every audio clip from the catalogued visuals.")
+    parser.add_argument("visuals_path", nargs="?", default=VISUALS_PATH)
+    parser.add_argument("audio_clips_path", nargs="?", default=AUDIO_CLIPS_PATH)
+    parser.add_argument("output_path", nargs="?", default=OUTPUT_PATH)
+    args = parser.parse_args(argv)
+    create_posts(args.visuals_path, args.audio_clips_path, args.output_path)
+
+if __name__ == "__main__":
+    main()
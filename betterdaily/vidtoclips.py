@@ -0,0 +1,268 @@
+import numpy as np
+from . import analysis_reader
+from .scenes import detect_scenes
+from . import scene_cache
+from . import catalog
+from . import phash
+from .detectors import CLASSIFIER_VERSION, analysis_frame, extract_features, labels_from_features
+from . import detectors
+from .clip_extract import EXTRACT_MODES, extract_segments
+import argparse
+import json
+import os
+
+def stream_scenes(video_path, threshold=30.0, min_scene_len=15, proxy_width=None, keyframes_only=False,
+                  downscale=None, start_frame=0):
+    # Decode the video once, yielding ((start, end), key_frame) as soon as each scene is closed.
+    return analysis_reader.stream_scenes(video_path, threshold, min_scene_len, proxy_width, keyframes_only, downscale,
+                                         start_frame)
+
+def extract_key_frames(video_path, scenes):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    key_frames = []
+    for scene in scenes:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, scene[0].get_frames())
+        ret, frame = cap.read()
+        if ret:
+            key_frames.append(frame)
+    cap.release()
+    return key_frames
+
+CLASSIFY_BATCH_SIZE = 64
+
+def frame_features(frames, source_width=None, lazy=True):
+    # extract_features for frames of any shape, grouped so each group is stacked in one batch.
+    features = {}
+    by_shape = {}
+    for i, frame in enumerate(frames):
+        by_shape.setdefault(frame.shape, []).append(i)
+    for indices in by_shape.values():
+        group = extract_features([frames[i] for i in indices], source_width, lazy)
+        for name, values in group.items():
+            features.setdefault(name, np.full(len(frames), np.nan))[indices] = values
+    return features
+
+def classify_frames(frames, source_width=None):
+    if not frames:
+        return np.empty(0, dtype="<U8")
+    return labels_from_features(frame_features(frames, source_width))
+
+def classify_scene(frame):
+    return str(classify_frames([frame])[0])
+
+def extract_clips(video_path, scenes, output_folder, context_filter, mode="copy", hashes=None, index_conn=None,
+                  max_distance=phash.DEFAULT_MAX_DISTANCE):
+    # hashes holds the perceptual hash of each scene's key frame. With them, a scene whose hash is
+    # within max_distance bits of a scene already kept, or of a clip already in output_folder
+    # (looked up through index_conn), is not extracted.
+    segments = []
+    segment_hashes = {}
+    for i, (scene, context) in enumerate(zip(scenes, context_filter)):
+        if context in ["training", "fight", "struggle", "victory"]:
+            start_time = scene[0].get_seconds()
+            end_time = scene[1].get_seconds()
+            output_path = f"{output_folder}/clip_{context}_{i+1}.mp4"
+            segments.append((start_time, end_time, output_path))
+            if hashes is not None:
+                segment_hashes[output_path] = int(hashes[i])
+
+    if hashes is not None:
+        seen = np.zeros(0, dtype=np.uint64)
+        if index_conn is not None:
+            # Clips this run is about to overwrite are not duplicates of themselves.
+            targets = {os.path.abspath(path) for _, _, path in segments}
+            paths, library = phash.library_hashes(index_conn, output_folder)
+            seen = library[[path not in targets for path in paths]] if paths else seen
+        kept = []
+        for segment in segments:
+            value = segment_hashes[segment[2]]
+            if phash.is_duplicate(seen, value, max_distance):
+                continue
+            kept.append(segment)
+            seen = np.append(seen, np.uint64(value))
+        if len(kept) < len(segments):
+            print(f"Skipping {len(segments) - len(kept)} near-duplicate scenes")
+        segments = kept
+
+    timings = extract_segments(video_path, segments, mode)
+    if index_conn is not None:
+        for _, _, path in segments:
+            if os.path.exists(path):
+                phash.record_clip(index_conn, path, segment_hashes[path])
+        index_conn.commit()
+    return timings
+
+def checkpoint_header(video_path, threshold, lazy, analysis):
+    return {"video": scene_cache.file_fingerprint(video_path), "threshold": threshold, "lazy": lazy,
+            "analysis": list(analysis), "classifier": CLASSIFIER_VERSION}
+
+def load_checkpoint(checkpoint, header):
+    # The scene records an interrupted analysis with the same header saved, or []. A line cut
+    # short by a crash has no newline and is ignored.
+    if not os.path.exists(checkpoint):
+        return []
+    with open(checkpoint) as file:
+        lines = [json.loads(line) for line in file if line.endswith("\n")]
+    if not lines or lines[0].get("header") != header:
+        return []
+    return lines[1:]
+
+def analyse_video(video_path, threshold=30.0, workers=1, lazy=True, proxy_width=None, keyframes_only=False,
+                  downscale=None, checkpoint=None):
+    # Returns the scene list, the features of each scene's key frame and the key frames'
+    # perceptual hashes. With a checkpoint file, every batch of scenes is appended to it with
+    # its features and hash as soon as it is measured, and an interrupted analysis resumes at
+    # the first scene not saved; the file is removed once the analysis is complete. Parallel
+    # detection takes a second pass over the key frames and is not checkpointed.
+    analysis = (proxy_width, keyframes_only, downscale)
+    if workers > 1 and not keyframes_only:
+        scenes = detect_scenes(video_path, threshold, workers, *analysis)
+        key_frames = extract_key_frames(video_path, scenes)
+        return scenes, frame_features(key_frames, lazy=lazy), phash.phashes(key_frames)
+
+    fps, source_width = analysis_reader.source_info(video_path)[:2]
+    saved = []
+    file = None
+    if checkpoint:
+        header = checkpoint_header(video_path, threshold, lazy, analysis)
+        saved = load_checkpoint(checkpoint, header)
+        file = open(checkpoint, "a" if saved else "w")
+        if saved:
+            print(f"Resuming analysis of {video_path} after {len(saved)} scenes")
+        else:
+            file.write(json.dumps({"header": header}) + "\n")
+            file.flush()
+    scenes = scene_cache.scenes_from_json({"fps": fps, "scenes": [record["scene"] for record in saved]})
+    hashes = [int(record["phash"], 16) for record in saved]
+    batches = [{name: np.array([record["features"][name] for record in saved], dtype=float)
+                for name in saved[0]["features"]}] if saved else []
+    pending = []
+
+    def measure():
+        # Edge counts are scaled to the source resolution even when proxy frames are analysed.
+        batch = frame_features(pending, source_width, lazy)
+        batches.append(batch)
+        if file is not None:
+            first = len(scenes) - len(pending)
+            for j, (start, end) in enumerate(scenes[first:]):
+                record = {"scene": [start.get_frames(), end.get_frames()], "phash": f"{hashes[first + j]:016x}",
+                          "features": {name: float(values[j]) for name, values in batch.items()}}
+                file.write(json.dumps(record) + "\n")
+            file.flush()
+        pending.clear()
+
+    start_frame = scenes[-1][1].get_frames() if scenes else 0
+    try:
+        for scene, key_frame in stream_scenes(video_path, threshold, proxy_width=proxy_width,
+                                              keyframes_only=keyframes_only, downscale=downscale,
+                                              start_frame=start_frame):
+            scenes.append(scene)
+            # Keep only the downscaled key frames and measure them a batch at a time.
+            frame = analysis_frame(key_frame)
+            pending.append(frame)
+            hashes.append(phash.phash(frame))
+            if len(pending) == CLASSIFY_BATCH_SIZE:
+                measure()
+        if pending:
+            measure()
+    finally:
+        if file is not None:
+            file.close()
+    if checkpoint:
+        os.remove(checkpoint)
+    hashes = np.array(hashes, dtype=np.uint64)
+    if not batches:
+        return scenes, {}, hashes
+    return scenes, {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}, hashes
+
+def process_video(video_path, output_folder, workers=1, threshold=30.0, cache_path=None, extract_mode="copy",
+                  dedup=True, index_path=catalog.DEFAULT_CATALOG_PATH, max_distance=phash.DEFAULT_MAX_DISTANCE,
+                  proxy_width=None, keyframes_only=False, downscale=None, checkpoint=None, summary=None):
+    # checkpoint is a file the analysis of each scene is saved to, so an interrupted analysis
+    # resumes; summary, if given, is filled with the number of scenes found and whether the
+    # analysis came from the cache.
+    analysis = (proxy_width, keyframes_only, downscale)
+    cached = False
+    if cache_path is None:
+        scenes, features, hashes = analyse_video(video_path, threshold, workers, True, *analysis, checkpoint)
+    else:
+        conn = scene_cache.open_cache(cache_path)
+        # Full-resolution analysis keeps its original cache key.
+        params = (threshold, CLASSIFIER_VERSION) + (analysis if any(analysis) else ())
+        key = scene_cache.cache_key("vidtoclips", video_path, *params)
+        entry = scene_cache.load(conn, key)
+        # Entries written before key frames were hashed are treated as misses.
+        if entry is not None and "phashes" in entry:
+            print(f"Using cached analysis for {video_path}")
+            cached = True
+            scenes = scene_cache.scenes_from_json(entry)
+            features = {name: np.array(values, dtype=float) for name, values in entry["features"].items()}
+            hashes = np.array([int(value, 16) for value in entry["phashes"]], dtype=np.uint64)
+        else:
+            # Cached features must be complete, so later threshold changes can be applied
+            # without decoding the video again.
+            scenes, features, hashes = analyse_video(video_path, threshold, workers, False, *analysis, checkpoint)
+            entry = scene_cache.scenes_to_json(scenes)
+            entry["features"] = {name: values.tolist() for name, values in features.items()}
+            entry["phashes"] = [f"{int(value):016x}" for value in hashes]
+            scene_cache.store(conn, key, entry)
+        conn.close()
+
+    if summary is not None:
+        summary["scenes"] = len(scenes)
+        summary["cached"] = cached
+    context_filter = list(labels_from_features(features)) if scenes else []
+    # Returns the wall-clock seconds spent on each clip written.
+    if not dedup:
+        return extract_clips(video_path, scenes, output_folder, context_filter, extract_mode)
+    index_conn = phash.open_index(index_path)
+    try:
+        return extract_clips(video_path, scenes, output_folder, context_filter, extract_mode, hashes, index_conn,
+                             max_distance)
+    finally:
+        index_conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect, classify and extract scenes from an anime episode.")
+    parser.add_argument("video_path")
+    parser.add_argument("output_folder")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used for scene detection (default: 1)")
+    parser.add_argument("--threshold", type=float, default=30.0,
+                        help="ContentDetector threshold (default: %(default)s)")
+    parser.add_argument("--cache", default=scene_cache.DEFAULT_CACHE_PATH,
+                        help="Analysis cache file (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Always analyse the video from scratch")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default="copy",
+                        help="copy: keyframe-snapped stream copy, accurate: frame-accurate re-encode")
+    parser.add_argument("--proxy-width", type=int, default=None,
+                        help="Decode at this width for analysis; clips are still cut from the source")
+    parser.add_argument("--keyframes-only", action="store_true",
+                        help="Analyse key frames only (scene cuts snap to key frames)")
+    parser.add_argument("--downscale", type=int, default=None,
+                        help="Scene detector downscale factor (default: chosen from the frame width)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Extract scenes even if they look like ones already extracted")
+    parser.add_argument("--max-distance", type=int, default=phash.DEFAULT_MAX_DISTANCE,
+                        help="Largest key-frame hash distance in bits treated as a duplicate (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the frames tested, hit rate and time per frame of each detector")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.output_folder):
+        os.makedirs(args.output_folder)
+    summary = {}
+    process_video(args.video_path, args.output_folder, args.workers, args.threshold,
+                  cache_path=None if args.no_cache else args.cache, extract_mode=args.extract_mode,
+                  dedup=not args.no_dedup, max_distance=args.max_distance, proxy_width=args.proxy_width,
+                  keyframes_only=args.keyframes_only, downscale=args.downscale, summary=summary)
+    if args.profile:
+        if summary["cached"]:
+            # Labelling cached features runs no detector, so there is nothing to profile.
+            print("The key frames were labelled from cached features; run with --no-cache to profile the detectors.")
+        else:
+            print(detectors.stats_report())
+
+if __name__ == "__main__":
+    main()
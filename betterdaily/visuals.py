@@ -0,0 +1,98 @@
+from . import analysis_reader, scene_cache
+from .scenes import detect_scenes
+from .clip_extract import EXTRACT_MODES, extract_segments
+import argparse
+import os
+
+"""
+visuals.py
+This script manages the process of classifying and processing the extracted video frames
+into different categories such as training, fight, struggle, and victory.
+"""
+
+def extract_clips(video_path, scenes, output_folder, context_filter, mode="copy"):
+    segments = []
+    for i, scene in enumerate(scenes):
+        start_time = scene[0].get_seconds()
+        end_time = scene[1].get_seconds()
+        if context_filter[i]:  # Check if the scene matches the desired context
+            output_path = f"{output_folder}/clip_{i+1}.mp4"
+            segments.append((start_time, end_time, output_path))
+    return extract_segments(video_path, segments, mode)
+
+def classify_scene(frame):
+    # Placeholder for a function that classifies the scene context (training, boxing, etc.)
+    # This could be replaced with a more sophisticated model
+    # For now, we will randomly classify scenes for demonstration purposes
+    # Replace this with your own logic
+    return "boxing"  # Example: Replace this with actual classification logic
+
+def cached_detect_scenes(video_path, cache_path, threshold=30.0, workers=1, analysis=(None, False, None),
+                         checkpoint=None):
+    # analysis is (proxy_width, keyframes_only, downscale).
+    conn = scene_cache.open_cache(cache_path)
+    key = scene_cache.cache_key("scenes", video_path, threshold, *(analysis if any(analysis) else ()))
+    entry = scene_cache.load(conn, key)
+    if entry is not None:
+        scenes = scene_cache.scenes_from_json(entry)
+    else:
+        scenes = detect_scenes(video_path, threshold, workers, *analysis, checkpoint)
+        scene_cache.store(conn, key, scene_cache.scenes_to_json(scenes))
+    conn.close()
+    return scenes
+
+def process_video(video_path, output_folder, workers=1, cache_path=None, extract_mode="copy",
+                  analysis=(None, False, None), checkpoint=None, summary=None):
+    # Step 1: Detect scenes
+    if cache_path is None:
+        scenes = detect_scenes(video_path, 30.0, workers, *analysis, checkpoint)
+    else:
+        scenes = cached_detect_scenes(video_path, cache_path, workers=workers, analysis=analysis,
+                                      checkpoint=checkpoint)
+    if summary is not None:
+        summary["scenes"] = len(scenes)
+
+    # Step 2: Classify scenes, on each scene's first frame read at the proxy width
+    width, keyframes_only = analysis[:2]
+    context_filter = []
+    for scene in scenes:
+        frame = analysis_reader.frame_at(video_path, scene[0].get_frames(), width, keyframes_only)
+        if frame is not None:
+            context = classify_scene(frame)
+            context_filter.append(context in ["training", "boxing", "struggling"])
+        else:
+            context_filter.append(False)
+
+    # Step 3: Extract and save clips
+    return extract_clips(video_path, scenes, output_folder, context_filter, extract_mode)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify scenes of an anime episode and extract matching clips.")
+    parser.add_argument("video_path", nargs="?",
+                        default="/Users/ahmadkaiss/Desktop/BetterDaily/Source Visual/anime_episode.mp4")
+    parser.add_argument("output_folder", nargs="?",
+                        default="/Users/ahmadkaiss/Desktop/BetterDaily/Visuals")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used for scene detection (default: 1)")
+    parser.add_argument("--cache", default=scene_cache.DEFAULT_CACHE_PATH,
+                        help="Analysis cache file (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Always detect scenes from scratch")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default="copy",
+                        help="copy: keyframe-snapped stream copy, accurate: frame-accurate re-encode")
+    parser.add_argument("--proxy-width", type=int, default=None,
+                        help="Decode at this width for scene detection; clips are still cut from the source")
+    parser.add_argument("--keyframes-only", action="store_true",
+                        help="Detect scenes on key frames only (scene cuts snap to key frames)")
+    parser.add_argument("--downscale", type=int, default=None,
+                        help="Scene detector downscale factor (default: chosen from the frame width)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.output_folder):
+        os.makedirs(args.output_folder)
+
+    process_video(args.video_path, args.output_folder, args.workers,
+                  cache_path=None if args.no_cache else args.cache, extract_mode=args.extract_mode,
+                  analysis=(args.proxy_width, args.keyframes_only, args.downscale))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
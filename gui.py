@@ -1,14 +1,17 @@
 import os
 import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog, scrolledtext
-import subprocess
+from tkinter import filedialog, messagebox, simpledialog, scrolledtext, ttk
+from betterdaily import jobs
 
-def run_script(script, args):
-    try:
-        subprocess.run(["python", script] + args, check=True)
-        messagebox.showinfo("Success", f"{script} executed successfully.")
-    except subprocess.CalledProcessError as e:
-        messagebox.showerror("Error", f"An error occurred: {e}")
+# How often the job list is refreshed, in milliseconds.
+POLL_MS = 500
+
+manager = jobs.start_manager()
+
+def run_command(command, args):
+    # Queues the command as a background job; the window stays responsive while it runs.
+    name = f"{command}: {os.path.basename(args[0]) if args else ''}"
+    jobs.submit(manager, name, jobs.command_line(command, args))
 
 def transcribe_audio():
     audio_file = filedialog.askopenfilename(title="Select Audio File", filetypes=[("MP3 files", "*.mp3")])
@@ -17,7 +20,7 @@ def transcribe_audio():
     output_dir = filedialog.askdirectory(title="Select Output Directory")
     if not output_dir:
         return
-    run_script("transcribe.py", [audio_file, output_dir])
+    run_command("transcribe", [audio_file, output_dir])
 
 def create_audio_segments():
     transcription_file = filedialog.askopenfilename(title="Select Transcription File", filetypes=[("Text files", "*.txt")])
@@ -29,7 +32,7 @@ def create_audio_segments():
     output_dir = filedialog.askdirectory(title="Select Output Directory")
     if not output_dir:
         return
-    run_script("audioseg.py", [transcription_file, audio_file, output_dir])
+    run_command("audioseg", [transcription_file, audio_file, output_dir])
 
 def extract_video_clips():
     video_file = filedialog.askopenfilename(title="Select Video File", filetypes=[("MP4 files", "*.mp4")])
@@ -38,7 +41,7 @@ def extract_video_clips():
     output_dir = filedialog.askdirectory(title="Select Output Directory")
     if not output_dir:
         return
-    run_script("vidtoclips.py", [video_file, output_dir])
+    run_command("vidtoclips", [video_file, output_dir])
 
 def extract_frames():
     video_file = filedialog.askopenfilename(title="Select Video File", filetypes=[("MP4 files", "*.mp4")])
@@ -50,7 +53,7 @@ def extract_frames():
     interval = simpledialog.askinteger("Input", "Enter frame extraction interval (seconds):", minvalue=1, maxvalue=600)
     if not interval:
         return
-    run_script("extract_frames.py", [video_file, output_dir, str(interval)])
+    run_command("extract_frames", [video_file, output_dir, str(interval)])
 
 def combine_audio_visual():
     audio_dir = filedialog.askdirectory(title="Select Audio Clips Directory")
@@ -62,7 +65,7 @@ def combine_audio_visual():
     output_dir = filedialog.askdirectory(title="Select Output Directory")
     if not output_dir:
         return
-    run_script("combine_audio_visual.py", [audio_dir, visual_dir, output_dir])
+    run_command("combine_audio_visual", [audio_dir, visual_dir, output_dir])
 
 def process_videos():
     visuals_path = filedialog.askdirectory(title="Select Visuals Directory")
@@ -74,7 +77,7 @@ def process_videos():
     output_path = filedialog.askdirectory(title="Select Output Directory")
     if not output_path:
         return
-    run_script("video.py", [visuals_path, audio_clips_path, output_path])
+    run_command("video", [visuals_path, audio_clips_path, output_path])
 
 def process_visuals():
     video_file = filedialog.askopenfilename(title="Select Video File", filetypes=[("MP4 files", "*.mp4")])
@@ -83,7 +86,7 @@ def process_visuals():
     output_dir = filedialog.askdirectory(title="Select Output Directory")
     if not output_dir:
         return
-    run_script("visuals.py", [video_file, output_dir])
+    run_command("visuals", [video_file, output_dir])
 
 def show_instructions():
     instructions = (
@@ -94,7 +97,9 @@ def show_instructions():
         "4. Extract Frames: Select a video file (MP4) to extract frames at specific intervals.\n"
         "5. Combine Audio & Visual: Select directories containing audio clips and visual clips to combine them into final videos.\n"
         "6. Process Videos: Select directories containing visuals and audio clips to process and create final videos.\n"
-        "7. Process Visuals: Select a video file (MP4) to classify scenes and extract clips based on context.\n"
+        "7. Process Visuals: Select a video file (MP4) to classify scenes and extract clips based on context.\n\n"
+        "Every task runs in the background and is added to the job list, so several can be queued at once. "
+        "Select a job to see its output; Cancel Job stops it, or removes it from the queue if it has not started.\n"
     )
     instructions_window = tk.Toplevel(app)
     instructions_window.title("Instructions")
@@ -106,7 +111,7 @@ def show_instructions():
 
 app = tk.Tk()
 app.title("Video Concatenation Project")
-app.geometry("800x600")
+app.geometry("900x850")
 
 frame = tk.Frame(app)
 frame.pack(pady=20)
@@ -138,4 +143,70 @@ btn_process_videos.pack(pady=5)
 btn_process_visuals = tk.Button(frame, text="Process Visuals", command=process_visuals)
 btn_process_visuals.pack(pady=5)
 
+def format_elapsed(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+
+def selected_job_id():
+    selection = job_list.selection()
+    return int(selection[0]) if selection else None
+
+def cancel_selected_job():
+    job = jobs.find_job(manager, selected_job_id())
+    if job is not None:
+        jobs.cancel(job)
+
+def update_jobs():
+    # Runs on the Tk thread; the jobs themselves only ever run on worker threads.
+    selected = selected_job_id()
+    for row in jobs.snapshot(manager):
+        values = (row["name"], row["status"], format_elapsed(row["elapsed"]), row["rate"], row["progress"][-80:])
+        item = str(row["id"])
+        if job_list.exists(item):
+            job_list.item(item, values=values)
+        else:
+            job_list.insert("", "end", iid=item, values=values)
+        if row["id"] == selected:
+            text = "\n".join(row["output"])
+            if row["status"] == "running" and row["progress"] and not text.endswith(row["progress"]):
+                text += "\n" + row["progress"]
+            if job_output.get("1.0", "end-1c") != text:
+                job_output.configure(state='normal')
+                job_output.delete("1.0", tk.END)
+                job_output.insert(tk.END, text)
+                job_output.see(tk.END)
+                job_output.configure(state='disabled')
+
+def poll_jobs():
+    update_jobs()
+    app.after(POLL_MS, poll_jobs)
+
+def on_close():
+    running = [row for row in jobs.snapshot(manager) if row["status"] in ("queued", "running")]
+    if running and not messagebox.askokcancel("Quit", f"{len(running)} jobs are still queued or running. "
+                                                      "Cancel them and quit?"):
+        return
+    jobs.stop_manager(manager)
+    app.destroy()
+
+jobs_frame = tk.Frame(app)
+jobs_frame.pack(expand=True, fill='both', padx=10, pady=10)
+
+job_list = ttk.Treeview(jobs_frame, columns=("job", "status", "elapsed", "rate", "progress"), show="headings",
+                        height=6, selectmode="browse")
+for column, heading, width in (("job", "Job", 200), ("status", "Status", 80), ("elapsed", "Elapsed", 70),
+                               ("rate", "Rate", 90), ("progress", "Progress", 320)):
+    job_list.heading(column, text=heading)
+    job_list.column(column, width=width, stretch=column == "progress")
+job_list.pack(fill='x')
+job_list.bind("<<TreeviewSelect>>", lambda event: update_jobs())
+
+btn_cancel = tk.Button(jobs_frame, text="Cancel Job", command=cancel_selected_job)
+btn_cancel.pack(pady=5)
+
+job_output = scrolledtext.ScrolledText(jobs_frame, wrap=tk.WORD, height=8, state='disabled')
+job_output.pack(expand=True, fill='both')
+
+app.protocol("WM_DELETE_WINDOW", on_close)
+app.after(POLL_MS, poll_jobs)
 app.mainloop()
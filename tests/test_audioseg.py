@@ -0,0 +1,60 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+pydub = pytest.importorskip("pydub")
+
+from betterdaily import audioseg, mp3cut
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+# A Layer III frame at 44.1 kHz holds 1152 samples; the 3 s source holds 116 of them.
+FRAME_MS = 1000 * 1152 / 44100
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "episode.mp3"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=3",
+                    "-ar", "44100", "-c:a", "libmp3lame", "-b:a", "128k", str(path)], check=True)
+    return str(path)
+
+def decoded_ms(path):
+    # Decoded length, from the 16-bit mono samples ffmpeg writes.
+    result = subprocess.run(["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-"],
+                            capture_output=True, check=True)
+    return 1000 * len(result.stdout) / 2 / 44100
+
+@pytest.mark.parametrize("start_ms, end_ms", [(1000, 1005), (1000, 1000), (0, 0)])
+def test_short_segment_is_extended_to_a_playable_cut(tmp_path, source, start_ms, end_ms):
+    output = str(tmp_path / "clip.mp3")
+    start, end = mp3cut.cut(source, mp3cut.build_index(source), start_ms, end_ms, output)
+    assert end - start == pytest.approx(mp3cut.MIN_FRAMES * FRAME_MS)
+    assert decoded_ms(output) == pytest.approx(mp3cut.MIN_FRAMES * FRAME_MS, abs=1)
+
+@pytest.mark.parametrize("start_ms, end_ms", [(5000, 6000), (3020, 3500)])
+def test_segment_at_the_end_raises(tmp_path, source, start_ms, end_ms):
+    output = tmp_path / "clip.mp3"
+    with pytest.raises(ValueError):
+        mp3cut.cut(source, mp3cut.build_index(source), start_ms, end_ms, str(output))
+    assert not output.exists()
+
+def test_create_audio_segments_reports_segments_it_cannot_cut(tmp_path, source, capsys):
+    segments = tmp_path / "segments.txt"
+    segments.write_text("1000,1005\n3020,3500\n500,1500\n")
+    output_dir = tmp_path / "clips"
+    audioseg.create_audio_segments(str(segments), source, str(output_dir))
+    assert sorted(os.listdir(output_dir)) == ["episode_clip1.mp3", "episode_clip3.mp3"]
+    assert "Skipped clip 2 for episode.mp3" in capsys.readouterr().out
+    assert decoded_ms(str(output_dir / "episode_clip3.mp3")) == pytest.approx(1000, abs=FRAME_MS)
+
+def test_unknown_mode_fails_with_usage(tmp_path, source, capsys):
+    segments = tmp_path / "segments.txt"
+    segments.write_text("500,1500\n")
+    with pytest.raises(SystemExit) as exit_info:
+        audioseg.main([str(segments), source, str(tmp_path / "clips"), "acurate"])
+    assert "Usage:" in str(exit_info.value.code)
+    assert not (tmp_path / "clips").exists()
+    with pytest.raises(ValueError):
+        audioseg.create_audio_segments(str(segments), source, str(tmp_path / "clips"), "fast")
@@ -0,0 +1,53 @@
+import shutil
+import subprocess
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from betterdaily.clip_extract import extract_segments
+from betterdaily.ffmpeg_utils import keyframe_times
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+FPS = 10
+SECONDS = 12
+GOP = 20
+# Each frame's gray level encodes its number, so a clip's first frame tells where it was cut.
+LEVEL_STEP = 2
+
+def make_clip(path):
+    frames = np.repeat(np.arange(FPS * SECONDS, dtype=np.uint8) * LEVEL_STEP, 64 * 64).tobytes()
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "rawvideo", "-pix_fmt", "gray", "-s", "64x64",
+                    "-r", str(FPS), "-i", "-", "-c:v", "libx264", "-g", str(GOP), "-keyint_min", str(GOP),
+                    "-sc_threshold", "0", "-bf", "0", "-pix_fmt", "yuv420p", str(path)],
+                   input=frames, check=True)
+
+def first_frame_time(path):
+    cap = cv2.VideoCapture(str(path))
+    ret, frame = cap.read()
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    assert ret
+    return round(frame.mean() / LEVEL_STEP) / FPS, frame_count / FPS
+
+def test_cuts_inside_one_gop(tmp_path):
+    path = tmp_path / "source.mp4"
+    make_clip(path)
+    assert keyframe_times(str(path)) == pytest.approx([t * GOP / FPS for t in range(SECONDS * FPS // GOP)])
+
+    # a and b start inside the GOP from 2 s to 4 s, and a also ends inside it.
+    segments = [(2.2, 2.6, str(tmp_path / "a.mp4")), (2.9, 5.0, str(tmp_path / "b.mp4")),
+                (6.5, 9.5, str(tmp_path / "c.mp4"))]
+    timings = extract_segments(str(path), segments, "copy")
+    assert sorted(timings) == sorted(output for _, _, output in segments)
+
+    # a has no keyframe inside it and is re-encoded; b and c start at the next keyframe and end
+    # at the keyframe after their end (c at the end of the run).
+    start, duration = first_frame_time(tmp_path / "a.mp4")
+    assert start == pytest.approx(2.2, abs=0.1) and duration == pytest.approx(0.4, abs=0.1)
+    start, duration = first_frame_time(tmp_path / "b.mp4")
+    assert start == pytest.approx(4.0) and duration == pytest.approx(2.0, abs=0.1)
+    start, duration = first_frame_time(tmp_path / "c.mp4")
+    assert start == pytest.approx(8.0) and duration == pytest.approx(1.5, abs=0.1)
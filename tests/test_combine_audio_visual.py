@@ -0,0 +1,75 @@
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("moviepy")
+
+from betterdaily.combine_audio_visual import can_stream_copy, render_post
+from betterdaily.ffmpeg_utils import media_info, probe_video
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+FPS = 24
+AUDIO_SECONDS = 5.0
+
+def ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-v", "error", "-y", *args], check=True)
+
+def make_clips(tmp_path):
+    # A 10 s episode with a keyframe every second and B-frames, cut with stream copy like the
+    # library clips: "late" starts half way into a GOP, so its first packets are pre-roll that
+    # its edit list hides and its first DTS is half a second before zero.
+    source = tmp_path / "episode.mp4"
+    ffmpeg("-f", "lavfi", "-i", f"testsrc2=size=160x120:rate={FPS}:duration=10",
+           "-f", "lavfi", "-i", "sine=frequency=440:duration=10",
+           "-c:v", "libx264", "-g", str(FPS), "-keyint_min", str(FPS), "-sc_threshold", "0", "-bf", "2",
+           "-pix_fmt", "yuv420p", "-c:a", "aac", str(source))
+    clips = {}
+    for name, start in (("first", 0), ("late", 2.5), ("last", 6)):
+        clips[name] = str(tmp_path / f"clip_{name}.mp4")
+        ffmpeg("-ss", str(start), "-i", str(source), "-t", "2", "-c", "copy", clips[name])
+    audio = tmp_path / "segment.mp3"
+    ffmpeg("-f", "lavfi", "-i", f"sine=frequency=220:duration={AUDIO_SECONDS}", "-c:a", "libmp3lame", str(audio))
+    return clips, str(audio)
+
+def video_dts(path):
+    result = subprocess.run(["ffmpeg", "-v", "error", "-i", str(path), "-map", "0:v:0", "-c", "copy",
+                             "-f", "framecrc", "-"], capture_output=True, text=True, check=True)
+    return [int(line.split(",")[1]) for line in result.stdout.splitlines() if not line.startswith("#")]
+
+def decoded_frames(path):
+    result = subprocess.run(["ffmpeg", "-v", "error", "-i", str(path), "-map", "0:v:0", "-f", "framecrc", "-"],
+                            capture_output=True, text=True, check=True)
+    return sum(not line.startswith("#") for line in result.stdout.splitlines())
+
+def assert_clean(path, audio, tolerance):
+    # tolerance is how far the video may run past the audio, in seconds.
+    dts = video_dts(path)
+    assert all(b > a for a, b in zip(dts, dts[1:]))
+    duration = media_info(audio)["duration"]
+    info = probe_video(str(path))
+    assert info["fps"] == pytest.approx(FPS, abs=0.01)
+    assert duration - 0.05 <= info["duration"] <= duration + tolerance
+    assert duration * FPS - 2 <= decoded_frames(path) <= (duration + tolerance) * FPS
+
+def test_chain_with_negative_start_is_rendered(tmp_path):
+    clips, audio = make_clips(tmp_path)
+    assert video_dts(clips["late"])[0] < 0
+    chain = [clips["first"], clips["late"], clips["last"]]
+    assert not can_stream_copy(chain)
+
+    output = tmp_path / "post.mp4"
+    render_post(audio, chain, str(output), overlay=False)
+    assert_clean(output, audio, 0.05)
+
+def test_single_clip_with_negative_start_is_copied(tmp_path):
+    clips, audio = make_clips(tmp_path)
+    assert can_stream_copy([clips["late"]])
+
+    short_audio = tmp_path / "short.mp3"
+    ffmpeg("-i", audio, "-t", "1.5", "-c", "copy", str(short_audio))
+    output = tmp_path / "post.mp4"
+    render_post(str(short_audio), clips["late"], str(output), overlay=False)
+    # The copied video is cut on packet timestamps, so it can end a few frames after the audio.
+    assert_clean(output, str(short_audio), 0.2)
@@ -0,0 +1,45 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+pytest.importorskip("scenedetect")
+
+from betterdaily.parallel_scenes import shard_boundaries
+from betterdaily.scenes import detect_scenes
+
+FPS = 24
+FRAMES = 240
+WORKERS = 4
+# Hard cuts one frame either side of the shard split points (60, 120, 180), plus a scene shorter
+# than the minimum scene length that straddles a split point.
+CUTS = [40, 59, 75, 121, 150, 178, 185, 205]
+COLORS = [(0, 0, 200), (200, 200, 200), (0, 150, 0), (250, 250, 250), (30, 30, 30), (0, 0, 255),
+          (120, 60, 200), (200, 120, 0), (90, 90, 90)]
+
+def make_clip(path):
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (320, 180))
+    scene = 0
+    for frame_num in range(FRAMES):
+        if scene < len(CUTS) and frame_num == CUTS[scene]:
+            scene += 1
+        frame = np.full((180, 320, 3), COLORS[scene], np.uint8)
+        frame = cv2.add(frame, rng.integers(0, 12, frame.shape, dtype=np.uint8))
+        writer.write(frame)
+    writer.release()
+
+def frames(scene_list):
+    return [(start.get_frames(), end.get_frames()) for start, end in scene_list]
+
+def test_parallel_matches_serial(tmp_path):
+    path = tmp_path / "cuts.mp4"
+    make_clip(path)
+
+    bounds = shard_boundaries(str(path), FRAMES, FPS, WORKERS)
+    assert len(bounds) == WORKERS + 1
+    for bound in bounds[1:-1]:
+        assert min(abs(bound - cut) for cut in CUTS) <= 2
+
+    serial = frames(detect_scenes(str(path), workers=1))
+    assert len(serial) > 1
+    assert frames(detect_scenes(str(path), workers=WORKERS)) == serial
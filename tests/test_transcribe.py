@@ -0,0 +1,87 @@
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydub")
+
+from pydub import AudioSegment
+from pydub.silence import split_on_silence
+
+from betterdaily import transcribe
+
+# Largest difference, in ms, allowed between a streamed chunk boundary and pydub's.
+TOLERANCE_MS = 1
+
+def write_wav(path, pattern, rate, channels=1, seed=0):
+    # pattern is a list of (seconds, tone) pieces; silent pieces are digital silence and tones
+    # carry a little noise, so every chunk of audio occurs only once in the file.
+    rng = np.random.default_rng(seed)
+    pieces = []
+    for seconds, tone in pattern:
+        n = int(seconds * rate)
+        if tone:
+            t = np.arange(n) / rate
+            signal = 8000 * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 200, n)
+        else:
+            signal = np.zeros(n)
+        pieces.append(signal)
+    samples = np.repeat(np.concatenate(pieces)[:, None], channels, axis=1).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+
+def pydub_ranges(path, keep_silence):
+    # Where each split_on_silence chunk lies in the source, in ms.
+    audio = AudioSegment.from_wav(str(path))
+    chunks = split_on_silence(audio, min_silence_len=1000, silence_thresh=audio.dBFS - 14,
+                              keep_silence=keep_silence)
+    bytes_per_ms = audio.frame_width * audio.frame_rate / 1000
+    # pydub pads a chunk that ends in the last partial millisecond with silence.
+    source = audio.raw_data + bytes(audio.frame_width * audio.frame_rate // 1000 + audio.frame_width)
+    ranges = []
+    search_from = 0
+    for chunk in chunks:
+        offset = source.find(chunk.raw_data, search_from)
+        assert offset >= 0
+        search_from = offset + len(chunk.raw_data)
+        ranges.append((offset / bytes_per_ms, search_from / bytes_per_ms))
+    return ranges
+
+def assert_close(streamed, reference):
+    assert len(streamed) == len(reference)
+    for (start, end), (ref_start, ref_end) in zip(streamed, reference):
+        assert abs(start - ref_start) <= TOLERANCE_MS and abs(end - ref_end) <= TOLERANCE_MS
+
+@pytest.mark.parametrize("pattern", [
+    # Leading and trailing silence.
+    [(2.0, False), (1.5, True), (1.5, False), (2.0, True), (2.5, False)],
+    # Tone from the first to the last sample.
+    [(1.0, True), (1.3, False), (0.7, True), (3.0, False), (1.2, True)],
+    # A gap too short to split on.
+    [(0.5, False), (1.0, True), (0.6, False), (1.0, True), (1.1, False)],
+])
+@pytest.mark.parametrize("rate,channels", [(16000, 1), (22050, 2)])
+def test_speech_ranges_match_split_on_silence(tmp_path, pattern, rate, channels):
+    path = tmp_path / "speech.wav"
+    write_wav(path, pattern, rate, channels)
+    assert_close(list(transcribe.speech_ranges(str(path))), pydub_ranges(path, 500))
+
+@pytest.mark.parametrize("keep_silence", [0, 300, 800, True])
+def test_keep_silence_padding(tmp_path, keep_silence):
+    # With 800 ms of padding the padded ranges around the 1.2 s gap overlap and are split halfway.
+    path = tmp_path / "speech.wav"
+    write_wav(path, [(1.5, False), (1.0, True), (1.2, False), (1.0, True), (2.0, False)], 16000)
+    assert_close(list(transcribe.speech_ranges(str(path), keep_silence=keep_silence)),
+                 pydub_ranges(path, keep_silence))
+
+def test_streamed_blocks_match(tmp_path, monkeypatch):
+    # Block boundaries inside silent windows must not move a chunk boundary.
+    path = tmp_path / "speech.wav"
+    write_wav(path, [(2.0, False), (1.5, True), (1.5, False), (2.0, True), (2.5, False)], 22050)
+    reference = pydub_ranges(path, 500)
+    for block_ms in (777, 1500):
+        monkeypatch.setattr(transcribe, "BLOCK_MS", block_ms)
+        assert_close(list(transcribe.speech_ranges(str(path))), reference)
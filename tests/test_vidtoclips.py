@@ -0,0 +1,60 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+pytest.importorskip("scenedetect")
+
+from betterdaily import phash, vidtoclips
+
+FPS = 24
+FRAMES = 200
+# Includes scenes shorter than the minimum scene length, which the detector merges.
+CUTS = [30, 52, 58, 90, 97, 130, 170]
+COLORS = [(0, 0, 200), (200, 200, 200), (0, 150, 0), (250, 250, 250), (30, 30, 30), (0, 0, 255),
+          (120, 60, 200), (200, 120, 0)]
+
+def make_clip(path):
+    rng = np.random.default_rng(1)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (320, 180))
+    scene = 0
+    for frame_num in range(FRAMES):
+        if scene < len(CUTS) and frame_num == CUTS[scene]:
+            scene += 1
+        frame = np.full((180, 320, 3), COLORS[scene], np.uint8)
+        writer.write(cv2.add(frame, rng.integers(0, 12, frame.shape, dtype=np.uint8)))
+    writer.release()
+
+def assert_same(result, reference):
+    scenes, features, hashes = result
+    assert [(s.get_frames(), e.get_frames()) for s, e in scenes] == \
+        [(s.get_frames(), e.get_frames()) for s, e in reference[0]]
+    assert features.keys() == reference[1].keys()
+    for name in features:
+        assert np.array_equal(features[name], reference[1][name], equal_nan=True)
+    assert np.array_equal(hashes, reference[2])
+
+def test_interrupted_analysis_resumes(tmp_path, monkeypatch):
+    path = tmp_path / "cuts.mp4"
+    make_clip(path)
+    reference = vidtoclips.analyse_video(str(path), lazy=False)
+    assert len(reference[0]) > 2
+
+    # Save every scene, and stop the analysis after each number of scenes in turn.
+    monkeypatch.setattr(vidtoclips, "CLASSIFY_BATCH_SIZE", 1)
+    real_phash = phash.phash
+    for stop_after in range(1, len(reference[0])):
+        checkpoint = tmp_path / f"checkpoint_{stop_after}.jsonl"
+        calls = []
+
+        def interrupted(frame):
+            calls.append(1)
+            if len(calls) > stop_after:
+                raise KeyboardInterrupt
+            return real_phash(frame)
+
+        monkeypatch.setattr(phash, "phash", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            vidtoclips.analyse_video(str(path), lazy=False, checkpoint=str(checkpoint))
+        monkeypatch.setattr(phash, "phash", real_phash)
+        assert_same(vidtoclips.analyse_video(str(path), lazy=False, checkpoint=str(checkpoint)), reference)
+        assert not checkpoint.exists()